@@ -0,0 +1,106 @@
+"""
+Single-producer/single-consumer byte ring for microphone PCM.
+The audio thread copies chunks into a preallocated buffer without touching
+the event loop; the loop side is only woken when a burst starts or a full
+batch is ready, instead of once per chunk.
+"""
+
+import asyncio
+from typing import Optional
+
+
+class AudioRing:
+    """Fixed-capacity SPSC ring: write() from the audio thread, get() on the loop
+
+    Positions are monotonically increasing byte counts; each side only
+    stores its own counter, after the copy, so no lock is needed.
+    """
+
+    def __init__(self, capacity: int, batch_bytes: int):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self.capacity = capacity
+        self.batch_bytes = batch_bytes
+        self.dropped = 0
+        self._mask = capacity - 1
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._head = 0  # Bytes consumed
+        self._tail = 0  # Bytes produced
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._signaled = False
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Attach the loop that get() runs on"""
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def available(self) -> int:
+        """Bytes written but not yet consumed"""
+        return self._tail - self._head
+
+    def write(self, data) -> bool:
+        """Copy a chunk in (producer side); drops it if the ring is full"""
+        n = len(data)
+        tail = self._tail
+        filled = tail - self._head
+        if n > self.capacity - filled:
+            self.dropped += n
+            return False
+
+        src = memoryview(data).cast("B")
+        start = tail & self._mask
+        first = min(n, self.capacity - start)
+        self._view[start : start + first] = src[:first]
+        if first < n:
+            self._view[: n - first] = src[first:]
+        # Publish only after the bytes are in place
+        self._tail = tail + n
+
+        # Wake the consumer when a burst starts and whenever a batch is ready
+        if (
+            self._loop is not None
+            and not self._signaled
+            and (filled == 0 or filled + n >= self.batch_bytes)
+        ):
+            self._signaled = True
+            self._loop.call_soon_threadsafe(self._ready.set)
+        return True
+
+    def read(self) -> bytes:
+        """Take everything currently buffered (consumer side)"""
+        head = self._head
+        n = self._tail - head
+        start = head & self._mask
+        first = min(n, self.capacity - start)
+        if first == n:
+            data = self._view[start : start + n].tobytes()
+        else:
+            data = self._view[start:].tobytes() + self._view[: n - first].tobytes()
+        self._head = head + n
+        return data
+
+    async def get(self, flush_after: float) -> bytes:
+        """Wait for a full batch, or flush_after seconds into a partial one"""
+        while not self.available():
+            await self._wait_signal()
+
+        deadline = self._loop.time() + flush_after
+        while self.available() < self.batch_bytes:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await self._wait_signal(remaining)
+            except asyncio.TimeoutError:
+                break
+        return self.read()
+
+    async def _wait_signal(self, timeout: Optional[float] = None):
+        """Wait for the producer's wakeup and re-arm it"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        finally:
+            self._ready.clear()
+            self._signaled = False
@@ -0,0 +1,43 @@
+"""
+Size accounting and LRU pruning for the on-disk synthesis caches.
+File mtimes double as the recency stamp: readers touch a file on every hit,
+so pruning only needs one scandir.
+"""
+
+import os
+
+
+def directory_bytes(directory: str) -> int:
+    """Total size of the files directly inside directory"""
+    return sum(entry.stat().st_size for entry in os.scandir(directory))
+
+
+def file_bytes(path: str) -> int:
+    """Size of path, or 0 if it doesn't exist"""
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+def prune_lru(directory: str, budget: int) -> int:
+    """Delete least recently used files until under 3/4 of budget
+
+    Returns the bytes left in the directory; scandir errors propagate.
+    """
+    entries = []
+    for entry in os.scandir(directory):
+        st = entry.stat()
+        entries.append((st.st_mtime, st.st_size, entry.path))
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= budget * 3 // 4:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            pass
+    return total
@@ -0,0 +1,65 @@
+"""
+Audio kernels for the PyAudio callback and TTS output conversion.
+Compiled with Numba when available so they run as tight nogil loops;
+falls back to equivalent NumPy code otherwise.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(nogil=True, cache=True)
+    def energy_sum_i16(buf):
+        """Sum of squared int16 samples, accumulated in int64"""
+        total = np.int64(0)
+        for i in range(buf.shape[0]):
+            sample = np.int64(buf[i])
+            total += sample * sample
+        return total
+
+    @njit(nogil=True, cache=True, fastmath=True)
+    def int16_to_float32(buf, out):
+        """Scale int16 samples into `out` as float32 in [-1, 1)"""
+        scale = np.float32(1.0 / 32768.0)
+        for i in range(buf.shape[0]):
+            out[i] = np.float32(buf[i]) * scale
+        return out
+
+    @njit(parallel=True, nogil=True, cache=True, fastmath=True)
+    def float32_to_int16(buf, out):
+        """Clip float samples to [-1, 1] and scale into `out` as int16"""
+        for i in prange(buf.shape[0]):
+            value = buf[i] * 32767.0
+            if value > 32767.0:
+                value = 32767.0
+            elif value < -32767.0:
+                value = -32767.0
+            out[i] = np.int16(value)
+        return out
+
+else:
+
+    def energy_sum_i16(buf):
+        """Sum of squared int16 samples, accumulated in int64"""
+        samples = buf.astype(np.int64)
+        return int(np.dot(samples, samples))
+
+    def int16_to_float32(buf, out):
+        """Scale int16 samples into `out` as float32 in [-1, 1)"""
+        np.multiply(buf, np.float32(1.0 / 32768.0), out=out)
+        return out
+
+    def float32_to_int16(buf, out):
+        """Clip float samples to [-1, 1] and scale into `out` as int16"""
+        scaled = np.clip(buf, -1.0, 1.0)
+        scaled *= 32767
+        out[:] = scaled
+        return out
@@ -0,0 +1,57 @@
+"""
+In-memory framing for mono 16-bit PCM WAV.
+The 44-byte header is fixed-shape, so it is packed directly instead of
+going through the wave module and a BytesIO.
+"""
+
+import struct
+from functools import lru_cache
+from typing import Optional, Tuple
+
+WAV_HEADER_SIZE = 44
+
+
+@lru_cache(maxsize=8)
+def _fmt_block(sample_rate: int) -> bytes:
+    """Header bytes between the two size fields, fixed per sample rate"""
+    return struct.pack(
+        "<4s4sIHHIIHH4s",
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        1,  # Mono
+        sample_rate,
+        sample_rate * 2,
+        2,
+        16,
+        b"data",
+    )
+
+
+def wav_header(data_size: int, sample_rate: int) -> bytes:
+    """RIFF header for `data_size` bytes of mono int16 PCM"""
+    return (
+        b"RIFF"
+        + struct.pack("<I", 36 + data_size)
+        + _fmt_block(sample_rate)
+        + struct.pack("<I", data_size)
+    )
+
+
+def split_wav(wav_data: bytes) -> Optional[Tuple[bytes, int]]:
+    """PCM payload and sample rate of a canonical mono int16 WAV, else None"""
+    if (
+        len(wav_data) < WAV_HEADER_SIZE
+        or wav_data[:4] != b"RIFF"
+        or wav_data[12:16] != b"fmt "
+        or wav_data[36:40] != b"data"
+    ):
+        return None
+    fmt_size, audio_format, channels, sample_rate = struct.unpack_from(
+        "<IHHI", wav_data, 16
+    )
+    bits = struct.unpack_from("<H", wav_data, 34)[0]
+    if (fmt_size, audio_format, channels, bits) != (16, 1, 1, 16):
+        return None
+    return wav_data[WAV_HEADER_SIZE:], sample_rate
@@ -3,7 +3,15 @@ import pyaudio
 import numpy as np
 from typing import Callable, Optional
 import logging
-from config import SAMPLE_RATE, CHUNK_SIZE, CHANNELS, FORMAT
+from config import (
+    SAMPLE_RATE,
+    CHUNK_SIZE,
+    CHANNELS,
+    FORMAT,
+    WHISPER_LIVE_SEND_QUEUE,
+    WHISPER_LIVE_MAX_FRAME_BYTES,
+)
+from agents._vad_kernels import energy_sum_i16
 
 logger = logging.getLogger(__name__)
 
@@ -15,19 +23,68 @@ class AudioInputAgent:
         chunk_size: int = CHUNK_SIZE,
         channels: int = CHANNELS,
         vad_threshold: float = 0.001,
+        vad_min_active: int = 3,
+        vad_hangover: int = 10,
     ):
         self.sample_rate = sample_rate
         self.chunk_size = chunk_size
         self.channels = channels
         self.vad_threshold = vad_threshold
-        self.audio = pyaudio.PyAudio()
-        self.stream: Optional[pyaudio.Stream] = None
+        # Mean-square energy threshold in the int16 domain, so the callback
+        # compares squared energies instead of taking sqrt and normalizing
+        self._vad_mean_sq_thr = (vad_threshold * 32768.0) ** 2
+
+        # Hysteresis VAD state: enter speech above the threshold after
+        # `_min_active` consecutive loud chunks, leave it only after
+        # `_hangover` consecutive chunks below half the threshold
+        self._state = "silence"
+        self._active_run = 0
+        self._silence_run = 0
+        self._enter_thr_sq = self._vad_mean_sq_thr
+        self._exit_thr_sq = self._vad_mean_sq_thr * 0.5
+        self._min_active = vad_min_active
+        self._hangover = vad_hangover
+        self._onset_chunks = []
         self.is_recording = False
         self.audio_callback: Optional[Callable] = None
+        # Loop that coroutine callbacks are scheduled on from the audio thread
+        self._callback_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._init_backend()
+
+    def _init_backend(self):
+        """Create the PyAudio instance used to open input streams"""
+        self.audio = pyaudio.PyAudio()
+        self.stream: Optional[pyaudio.Stream] = None
 
     def set_audio_callback(self, callback: Callable[[bytes], None]):
-        """Set callback function to handle audio chunks"""
+        """Set callback function to handle audio chunks
+
+        Chunks are bytes-like (bytes, or a memoryview on SoundDeviceInputAgent)
+        and are only guaranteed valid until pool_frames() further chunks have
+        been emitted; a consumer holding them longer must copy.
+        """
         self.audio_callback = callback
+        self._bind_callback_loop()
+
+    def _bind_callback_loop(self):
+        """Capture the running loop if the callback is a coroutine function"""
+        if not asyncio.iscoroutinefunction(self.audio_callback):
+            self._callback_loop = None
+            return
+        try:
+            self._callback_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not in a loop yet; start_recording binds it
+            pass
+
+    def _emit(self, chunk: bytes):
+        """Deliver a chunk from the audio thread to the callback"""
+        if self._callback_loop is not None:
+            asyncio.run_coroutine_threadsafe(
+                self.audio_callback(chunk), self._callback_loop
+            )
+        else:
+            self.audio_callback(chunk)
 
     def start_recording(self):
         """Start audio recording"""
@@ -35,6 +92,7 @@ class AudioInputAgent:
             logger.warning("Already recording")
             return
 
+        self._bind_callback_loop()
         try:
             self.stream = self.audio.open(
                 format=pyaudio.paInt16,
@@ -70,17 +128,65 @@ class AudioInputAgent:
         except Exception as e:
             logger.error(f"Error stopping recording: {e}")
 
+    def pool_frames(self) -> int:
+        """Emitted chunks a consumer may hold before the oldest is reused
+
+        Covers a full WhisperLive send queue, one capped coalesced frame plus
+        the chunk carried over from it, and the VAD onset buffer.
+        """
+        frame_bytes = self.chunk_size * self.channels * 2
+        return (
+            WHISPER_LIVE_SEND_QUEUE
+            + -(-WHISPER_LIVE_MAX_FRAME_BYTES // frame_bytes)
+            + 1
+            + self._min_active
+        )
+
     def _audio_callback(self, in_data, frame_count, time_info, status):
         """PyAudio callback for processing audio chunks"""
         if status:
             logger.warning(f"Audio callback status: {status}")
 
-        # Send all audio chunks (VAD disabled for debugging)
         if self.audio_callback:
-            self.audio_callback(in_data)
+            # Energy VAD: int64 accumulator (int32 overflows on a single loud
+            # chunk), no float normalization or sqrt
+            samples = np.frombuffer(in_data, dtype=np.int16)
+            if samples.size:
+                mean_sq = int(energy_sum_i16(samples)) / samples.size
+                self._process_vad(in_data, mean_sq)
 
         return (None, pyaudio.paContinue)
 
+    def _process_vad(self, in_data: bytes, mean_sq: float):
+        """Advance the hysteresis VAD and emit chunks that belong to speech"""
+        if self._state == "silence":
+            if mean_sq > self._enter_thr_sq:
+                self._active_run += 1
+                self._onset_chunks.append(in_data)
+                if self._active_run >= self._min_active:
+                    # Flush the onset so the start of the utterance isn't clipped
+                    self._state = "speech"
+                    self._silence_run = 0
+                    for chunk in self._onset_chunks:
+                        self._emit(chunk)
+                    self._onset_chunks.clear()
+            else:
+                # Isolated noise frames never reach downstream
+                self._active_run = 0
+                self._onset_chunks.clear()
+            return
+
+        if mean_sq > self._exit_thr_sq:
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+            if self._silence_run > self._hangover:
+                self._state = "silence"
+                self._active_run = 0
+                return
+
+        self._emit(in_data)
+
     async def record_async(self, duration: Optional[float] = None):
         """Async recording method"""
         self.start_recording()
@@ -118,6 +224,109 @@ class AudioInputAgent:
             self.audio.terminate()
 
 
+# Alternative audio input using sounddevice
+try:
+    import sounddevice as sd
+
+    class SoundDeviceInputAgent(AudioInputAgent):
+        """Alternative audio input using sounddevice
+
+        The callback receives an int16 ndarray view of PortAudio's buffer,
+        so the VAD runs on it directly without np.frombuffer. Chunks are
+        emitted as memoryviews into a preallocated round-robin pool of
+        pool_frames() frames instead of a fresh bytes object each.
+        """
+
+        def _init_backend(self):
+            self.stream: Optional[sd.InputStream] = None
+            self._frame_pool = np.empty(
+                (self.pool_frames(), self.chunk_size * self.channels), dtype=np.int16
+            )
+            self._pool_index = 0
+
+        def start_recording(self):
+            """Start audio recording"""
+            if self.is_recording:
+                logger.warning("Already recording")
+                return
+
+            self._bind_callback_loop()
+            try:
+                self.stream = sd.InputStream(
+                    samplerate=self.sample_rate,
+                    channels=self.channels,
+                    dtype="int16",
+                    blocksize=self.chunk_size,
+                    callback=self._audio_callback,
+                )
+                self.stream.start()
+                self.is_recording = True
+                logger.info(
+                    f"Started recording: {self.sample_rate}Hz, {self.channels} channel(s)"
+                )
+
+            except Exception as e:
+                logger.error(f"Failed to start recording: {e}")
+                raise
+
+        def stop_recording(self):
+            """Stop audio recording"""
+            if not self.is_recording:
+                return
+
+            try:
+                if self.stream:
+                    self.stream.stop()
+                    self.stream.close()
+                    self.stream = None
+                self.is_recording = False
+                logger.info("Stopped recording")
+
+            except Exception as e:
+                logger.error(f"Error stopping recording: {e}")
+
+        def _audio_callback(self, indata, frames, time_info, status):
+            """sounddevice callback for processing audio chunks"""
+            if status:
+                logger.warning(f"Audio callback status: {status}")
+
+            if self.audio_callback and frames:
+                samples = indata.reshape(-1)
+                mean_sq = int(energy_sum_i16(samples)) / samples.size
+                # indata is only valid during the callback, so hand out a copy
+                self._process_vad(self._pooled_copy(samples), mean_sq)
+
+        def _pooled_copy(self, samples):
+            """Copy samples into the next preallocated frame and view its bytes"""
+            n = samples.size
+            if n > self._frame_pool.shape[1]:
+                return samples.tobytes()
+
+            buf = self._frame_pool[self._pool_index, :n]
+            self._pool_index = (self._pool_index + 1) % len(self._frame_pool)
+            np.copyto(buf, samples)
+            return memoryview(buf).cast("B")
+
+        def get_audio_devices(self):
+            """Get list of available audio input devices"""
+            devices = []
+            for i, device_info in enumerate(sd.query_devices()):
+                if device_info["max_input_channels"] > 0:
+                    devices.append(
+                        {
+                            "index": i,
+                            "name": device_info["name"],
+                            "channels": device_info["max_input_channels"],
+                            "sample_rate": device_info["default_samplerate"],
+                        }
+                    )
+            return devices
+
+except ImportError:
+    logger.warning("sounddevice not available, using PyAudio only")
+    SoundDeviceInputAgent = None
+
+
 # Example usage
 async def main():
     logging.basicConfig(level=logging.INFO)
@@ -1,24 +1,59 @@
 import asyncio
 import pygame
 import io
-import wave
 import logging
 from typing import Optional
 import threading
-import queue
+from collections import deque
+import numpy as np
 from config import SAMPLE_RATE
+from agents._vad_kernels import int16_to_float32
+from agents._wav import wav_header
+
+try:
+    import sounddevice as sd
+
+    SOUNDDEVICE_AVAILABLE = True
+except ImportError:
+    SOUNDDEVICE_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
+def _resolve(future: asyncio.Future):
+    """Complete a drain future unless its waiter already gave up"""
+    if not future.done():
+        future.set_result(None)
+
+
 class AudioOutputAgent:
-    def __init__(self, sample_rate: int = SAMPLE_RATE):
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        max_queued: int = 4,
+        drop_oldest: bool = False,
+    ):
         self.sample_rate = sample_rate
         self.is_initialized = False
         self.is_playing = False
-        self.audio_queue = queue.Queue()
+        # Single-producer/single-consumer hand-off: deque append/popleft are
+        # atomic, so the events are only used to wake the other side; the
+        # space event lives on the producer's loop and is set from the
+        # playback thread via call_soon_threadsafe.
+        # The queue is bounded to cap latency: producers wait for space by
+        # default, or the oldest audio is discarded when drop_oldest is set.
+        # The deque itself is unbounded so a maxlen eviction can never take
+        # a drain marker or the shutdown sentinel
+        self.max_queued = max_queued
+        self.drop_oldest = drop_oldest
+        self.audio_queue = deque()
+        self._data_ready = threading.Event()
+        self._space_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._space_available: Optional[asyncio.Event] = None
         self.playback_thread: Optional[threading.Thread] = None
         self.stop_playback = threading.Event()
+        self._pcm_stream = None
+        self._pcm_stream_rate: Optional[int] = None
 
     def initialize(self):
         """Initialize pygame mixer for audio playback"""
@@ -27,7 +62,7 @@ class AudioOutputAgent:
                 frequency=self.sample_rate,
                 size=-16,  # 16-bit signed
                 channels=1,  # Mono
-                buffer=1024,
+                buffer=4096,  # Larger buffer avoids popping under CPU load
             )
             pygame.mixer.init()
             self.is_initialized = True
@@ -47,19 +82,85 @@ class AudioOutputAgent:
         """Worker thread for audio playback"""
         while not self.stop_playback.is_set():
             try:
-                # Get audio data from queue (with timeout)
-                audio_data = self.audio_queue.get(timeout=0.1)
+                audio_data = self.audio_queue.popleft()
+            except IndexError:
+                # Nothing queued: sleep until the producer signals (with timeout)
+                self._data_ready.wait(timeout=0.1)
+                self._data_ready.clear()
+                continue
 
-                if audio_data is None:  # Shutdown signal
-                    break
+            self._signal_space()
 
-                self._play_audio_data(audio_data)
-                self.audio_queue.task_done()
+            if audio_data is None:  # Shutdown signal
+                break
 
-            except queue.Empty:
+            if callable(audio_data):  # Drain marker: everything before it played
+                audio_data()
                 continue
+
+            try:
+                self.is_playing = True
+                if isinstance(audio_data, tuple):
+                    self._play_pcm_data(*audio_data)
+                else:
+                    self._play_audio_data(audio_data)
             except Exception as e:
                 logger.error(f"Playback worker error: {e}")
+            finally:
+                self.is_playing = False
+
+    def _enqueue(self, item):
+        """Hand an item to the playback thread"""
+        self.audio_queue.append(item)
+        self._data_ready.set()
+
+    def _signal_space(self):
+        """Wake a producer waiting for queue space (any thread)"""
+        loop, event = self._space_loop, self._space_available
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # The producer's loop has closed; nobody is waiting on it
+            pass
+
+    async def _enqueue_with_backpressure(self, item):
+        """Wait for queue space (or drop the oldest audio), then enqueue"""
+        if self.drop_oldest:
+            # Drain markers don't displace audio
+            if not callable(item):
+                self._discard_oldest()
+        else:
+            loop = asyncio.get_running_loop()
+            if self._space_loop is not loop:
+                self._space_available = asyncio.Event()
+                self._space_loop = loop
+            while (
+                len(self.audio_queue) >= self.max_queued
+                and not self.stop_playback.is_set()
+            ):
+                self._space_available.clear()
+                # Re-check after clearing: a pop in between already signalled
+                if len(self.audio_queue) < self.max_queued:
+                    break
+                await self._space_available.wait()
+        self._enqueue(item)
+
+    def _discard_oldest(self):
+        """Drop items from the front until one more fits (drop_oldest mode)"""
+        while len(self.audio_queue) >= self.max_queued:
+            try:
+                item = self.audio_queue.popleft()
+            except IndexError:
+                return  # The playback thread took the rest
+            if item is None:
+                # Shutting down; the sentinel must still reach the worker
+                self.audio_queue.appendleft(item)
+                return
+            if callable(item):
+                # Drain marker: everything before it is played or discarded
+                item()
 
     def _play_audio_data(self, audio_data: bytes):
         """Play audio data using pygame"""
@@ -78,6 +179,57 @@ class AudioOutputAgent:
         except Exception as e:
             logger.error(f"Audio playback error: {e}")
 
+    def _play_pcm_data(self, pcm: bytes, sample_rate: int):
+        """Play raw int16 mono PCM on a persistent sounddevice stream"""
+        try:
+            if not SOUNDDEVICE_AVAILABLE:
+                # pygame needs a container to resample to the mixer rate
+                self._play_audio_data(self._pcm_to_wav(pcm, sample_rate))
+                return
+
+            if self._pcm_stream is None or self._pcm_stream_rate != sample_rate:
+                self._close_pcm_stream()
+                self._pcm_stream = sd.OutputStream(
+                    samplerate=sample_rate,
+                    channels=1,
+                    dtype="int16",
+                    blocksize=2048,
+                    latency="low",
+                )
+                self._pcm_stream.start()
+                self._pcm_stream_rate = sample_rate
+
+            # Blocks in PortAudio with the GIL released until queued
+            samples = np.frombuffer(pcm, dtype=np.int16)
+            self._pcm_stream.write(samples.reshape(-1, 1))
+
+        except Exception as e:
+            logger.error(f"PCM playback error: {e}")
+
+    def _pcm_to_wav(self, pcm: bytes, sample_rate: int) -> bytes:
+        """Wrap raw int16 mono PCM in a WAV container"""
+        return wav_header(len(pcm), sample_rate) + pcm
+
+    def _close_pcm_stream(self):
+        """Abort and close the PCM output stream if open"""
+        if self._pcm_stream is not None:
+            self._pcm_stream.abort()
+            self._pcm_stream.close()
+            self._pcm_stream = None
+            self._pcm_stream_rate = None
+
+    async def play_pcm(self, pcm: bytes, sample_rate: Optional[int] = None):
+        """Queue raw int16 mono PCM for playback"""
+        if not self.is_initialized:
+            self.initialize()
+
+        if not pcm:
+            logger.warning("Empty audio data received")
+            return
+
+        await self._enqueue_with_backpressure((pcm, sample_rate or self.sample_rate))
+        logger.debug(f"Queued PCM: {len(pcm)} bytes")
+
     async def play_audio(self, audio_data: bytes):
         """Queue audio data for playback"""
         if not self.is_initialized:
@@ -89,23 +241,34 @@ class AudioOutputAgent:
 
         try:
             # Add audio to playback queue
-            self.audio_queue.put(audio_data)
+            await self._enqueue_with_backpressure(audio_data)
             logger.debug(f"Queued audio: {len(audio_data)} bytes")
 
         except Exception as e:
             logger.error(f"Failed to queue audio: {e}")
 
+    async def drained(self, timeout: float = 10.0):
+        """Wait until everything queued so far has been played"""
+        if self.playback_thread is None or not self.playback_thread.is_alive():
+            return
+
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        await self._enqueue_with_backpressure(
+            lambda: loop.call_soon_threadsafe(_resolve, done)
+        )
+        try:
+            await asyncio.wait_for(done, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out waiting for audio playback to finish")
+
     def stop_all_audio(self):
         """Stop all audio playback"""
         try:
             pygame.mixer.stop()
+            self._close_pcm_stream()
             # Clear the queue
-            while not self.audio_queue.empty():
-                try:
-                    self.audio_queue.get_nowait()
-                    self.audio_queue.task_done()
-                except queue.Empty:
-                    break
+            self.audio_queue.clear()
             logger.info("Stopped all audio playback")
         except Exception as e:
             logger.error(f"Error stopping audio: {e}")
@@ -122,7 +285,11 @@ class AudioOutputAgent:
     def is_busy(self) -> bool:
         """Check if audio is currently playing"""
         try:
-            return pygame.mixer.get_busy() or not self.audio_queue.empty()
+            return (
+                self.is_playing
+                or pygame.mixer.get_busy()
+                or len(self.audio_queue) > 0
+            )
         except:
             return False
 
@@ -139,12 +306,16 @@ class AudioOutputAgent:
         """Cleanup resources"""
         try:
             self.stop_playback.set()
+            # Release producers blocked on a queue that won't drain any more
+            self._signal_space()
 
             if self.playback_thread and self.playback_thread.is_alive():
                 # Signal shutdown
-                self.audio_queue.put(None)
+                self._enqueue(None)
                 self.playback_thread.join(timeout=2.0)
 
+            self._close_pcm_stream()
+
             if self.is_initialized:
                 pygame.mixer.quit()
                 self.is_initialized = False
@@ -160,36 +331,79 @@ class AudioOutputAgent:
 
 
 # Alternative simpler audio output using sounddevice
-try:
-    import sounddevice as sd
-    import numpy as np
+if SOUNDDEVICE_AVAILABLE:
 
     class SoundDeviceOutputAgent:
         """Alternative audio output using sounddevice"""
 
+        WRITE_BLOCK = 4096  # samples per stream.write call
+
         def __init__(self, sample_rate: int = SAMPLE_RATE):
             self.sample_rate = sample_rate
+            self._stream: Optional[sd.OutputStream] = None
+            self._writing = False
+            # Reused int16 -> float32 conversion buffer (10 s, grown on demand)
+            self._scratch = np.empty(sample_rate * 10, dtype=np.float32)
+            self._play_lock = asyncio.Lock()
+
+        def initialize(self):
+            """Open the long-lived output stream"""
+            if self._stream is not None:
+                return
+            self._stream = sd.OutputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype="float32",
+                blocksize=2048,
+                latency="high",
+            )
+            self._stream.start()
+            logger.info(f"SoundDevice output stream opened: {self.sample_rate}Hz")
+
+        def _write(self, audio_float: np.ndarray):
+            """Blocking write; PortAudio releases the GIL while it waits"""
+            self._writing = True
+            try:
+                for i in range(0, len(audio_float), self.WRITE_BLOCK):
+                    self._stream.write(audio_float[i : i + self.WRITE_BLOCK])
+            finally:
+                self._writing = False
 
         async def play_audio(self, audio_data: bytes):
             """Play audio using sounddevice"""
             try:
+                self.initialize()
+
                 # Convert bytes to numpy array
                 # Assuming 16-bit PCM audio
                 audio_array = np.frombuffer(audio_data, dtype=np.int16)
+                n = len(audio_array)
 
-                # Normalize to float32 range [-1, 1]
-                audio_float = audio_array.astype(np.float32) / 32768.0
+                # The scratch buffer is shared, so one playback at a time
+                async with self._play_lock:
+                    if n > self._scratch.size:
+                        self._scratch = np.empty(
+                            max(n, self._scratch.size * 2), dtype=np.float32
+                        )
 
-                # Play audio (blocking)
-                sd.play(audio_float, samplerate=self.sample_rate)
-                sd.wait()  # Wait for playback to complete
+                    # Normalize to float32 range [-1, 1] without allocating
+                    audio_float = int16_to_float32(audio_array, self._scratch[:n])
+
+                    # Write from a worker thread so the event loop keeps running
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self._write, audio_float.reshape(-1, 1)
+                    )
 
             except Exception as e:
                 logger.error(f"SoundDevice playback error: {e}")
 
         def stop_all_audio(self):
             """Stop all audio playback"""
-            sd.stop()
+            if self._stream is not None:
+                # Drop buffered audio immediately, then reopen on next play
+                self._stream.abort()
+                self._stream.close()
+                self._stream = None
 
         def set_volume(self, volume: float):
             """Set volume (not directly supported by sounddevice)"""
@@ -197,13 +411,13 @@ try:
 
         def is_busy(self) -> bool:
             """Check if audio is playing"""
-            return sd.get_stream().active if sd.get_stream() else False
+            return self._writing
 
         def cleanup(self):
             """Cleanup"""
-            sd.stop()
+            self.stop_all_audio()
 
-except ImportError:
+else:
     logger.warning("sounddevice not available, using pygame only")
     SoundDeviceOutputAgent = None
 
@@ -225,11 +439,16 @@ async def main():
         frequency = 440  # Hz (A4 note)
         sample_rate = 16000
 
-        t = np.linspace(0, duration, int(sample_rate * duration), False)
-        tone = np.sin(2 * np.pi * frequency * t)
+        # Phase ramp computed in place: one float32 buffer, one int16 output
+        n = int(sample_rate * duration)
+        tone = np.arange(n, dtype=np.float32)
+        np.multiply(tone, np.float32(2 * np.pi * frequency / sample_rate), out=tone)
+        np.sin(tone, out=tone)
 
         # Convert to 16-bit PCM
-        audio_data = (tone * 32767).astype(np.int16)
+        np.multiply(tone, np.float32(32767), out=tone)
+        np.rint(tone, out=tone)
+        audio_data = tone.astype(np.int16)
 
         # Create WAV file in memory
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
@@ -2,11 +2,31 @@ import asyncio
 import aiohttp
 import json
 import logging
-from typing import List, Dict, Optional, AsyncGenerator
+from collections import OrderedDict, deque
+from typing import List, Dict, Optional, AsyncGenerator, Deque
 from config import OLLAMA_BASE_URL, OLLAMA_MODEL
 
+try:
+    import orjson
+
+    # orjson parses bytes directly; its JSONDecodeError subclasses json's
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 logger = logging.getLogger(__name__)
 
+# Server-sent event framing used by the streaming chat endpoint
+_SSE_DATA_PREFIX = b"data: "
+_SSE_DONE = b"[DONE]"
+
+# Replies kept for repeated (prompt, history, input) turns
+_RESPONSE_CACHE_ITEMS = 128
+
 
 class LLMAgent:
     def __init__(
@@ -17,42 +37,73 @@ class LLMAgent:
     ):
         self.base_url = base_url
         self.model = model
-        self.conversation_history: List[Dict[str, str]] = []
+        # Bounded to the last 10 exchanges to manage context
+        self.conversation_history: Deque[Dict[str, str]] = deque(maxlen=20)
         self.system_prompt = system_prompt or self._default_system_prompt()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._response_cache: OrderedDict = OrderedDict()
+
+        # Static tail of the request body, pre-encoded per stream flag; only
+        # the messages array is serialized per request
+        self._payload_static = {
+            stream: b',"model":'
+            + _json_dumps(self.model)
+            + b',"stream":'
+            + (b"true" if stream else b"false")
+            + b',"temperature":0.7,"max_tokens":150}'  # Concise for voice
+            for stream in (False, True)
+        }
 
     def _default_system_prompt(self) -> str:
         return """You are a helpful voice assistant. Respond naturally and conversationally. 
 Keep your responses concise but informative. You are designed to have spoken conversations, 
 so avoid using formatting like bullet points or numbered lists unless specifically requested."""
 
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared keep-alive session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=30),
+                headers={
+                    "Content-Type": "application/json",
+                    "Connection": "keep-alive",
+                },
+            )
+        return self._session
+
+    async def aclose(self):
+        """Close the shared HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     async def _make_request(
         self, messages: List[Dict[str, str]], stream: bool = False
     ) -> Dict:
         """Make request to Ollama OpenAI-compatible API"""
-        headers = {"Content-Type": "application/json"}
-
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": stream,
-            "temperature": 0.7,
-            "max_tokens": 150,  # Keep responses concise for voice
-        }
+        body = b'{"messages":' + _json_dumps(messages) + self._payload_static[stream]
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions", headers=headers, json=payload
-                ) as response:
-                    if response.status == 200:
-                        if stream:
-                            return response
-                        else:
-                            return await response.json()
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"LLM API error {response.status}: {error_text}")
-                        return {"error": f"API error: {response.status}"}
+            session = await self._get_session()
+            response = await session.post(
+                f"{self.base_url}/chat/completions",
+                data=body,
+                headers={"Content-Type": "application/json"},
+            )
+            if response.status == 200:
+                if stream:
+                    # Caller reads the body and releases the connection
+                    return response
+                try:
+                    return await response.json()
+                finally:
+                    response.release()
+            else:
+                error_text = await response.text()
+                response.release()
+                logger.error(f"LLM API error {response.status}: {error_text}")
+                return {"error": f"API error: {response.status}"}
 
         except Exception as e:
             logger.error(f"LLM request failed: {e}")
@@ -60,15 +111,27 @@ so avoid using formatting like bullet points or numbered lists unless specifical
 
     async def generate_response(self, user_input: str) -> str:
         """Generate response to user input"""
+        # Same prompt, history and input: the reply is reused
+        key = (
+            self.system_prompt,
+            tuple((m["role"], m["content"]) for m in self.conversation_history),
+            user_input,
+        )
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            self._response_cache.move_to_end(key)
+            self.conversation_history.append({"role": "user", "content": user_input})
+            self.conversation_history.append({"role": "assistant", "content": cached})
+            return cached.strip()
+
         # Add user message to conversation
         self.conversation_history.append({"role": "user", "content": user_input})
 
-        # Prepare messages with system prompt
-        messages = [{"role": "system", "content": self.system_prompt}]
-
-        # Add conversation history (keep last 10 exchanges to manage context)
-        recent_history = self.conversation_history[-20:]  # Last 10 exchanges
-        messages.extend(recent_history)
+        # Prepare messages with system prompt and the bounded history
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            *self.conversation_history,
+        ]
 
         # Make request
         response = await self._make_request(messages)
@@ -88,6 +151,9 @@ so avoid using formatting like bullet points or numbered lists unless specifical
                 {"role": "assistant", "content": assistant_response}
             )
 
+            self._response_cache[key] = assistant_response
+            if len(self._response_cache) > _RESPONSE_CACHE_ITEMS:
+                self._response_cache.popitem(last=False)
             return assistant_response.strip()
 
         except (KeyError, IndexError) as e:
@@ -102,9 +168,10 @@ so avoid using formatting like bullet points or numbered lists unless specifical
         self.conversation_history.append({"role": "user", "content": user_input})
 
         # Prepare messages
-        messages = [{"role": "system", "content": self.system_prompt}]
-        recent_history = self.conversation_history[-20:]
-        messages.extend(recent_history)
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            *self.conversation_history,
+        ]
 
         # Make streaming request
         response = await self._make_request(messages, stream=True)
@@ -113,40 +180,42 @@ so avoid using formatting like bullet points or numbered lists unless specifical
             yield f"Sorry, I'm having trouble processing that. {response['error']}"
             return
 
-        full_response = ""
+        parts: List[str] = []
         try:
+            # Lines arrive already split; stay in bytes until the JSON decode
             async for line in response.content:
-                line = line.decode("utf-8").strip()
-                if line.startswith("data: "):
-                    data = line[6:]  # Remove 'data: ' prefix
-                    if data == "[DONE]":
+                if line.startswith(_SSE_DATA_PREFIX):
+                    data = line[len(_SSE_DATA_PREFIX) :].rstrip()
+                    if data == _SSE_DONE:
                         break
 
                     try:
-                        chunk = json.loads(data)
+                        chunk = _json_loads(data)
                         delta = chunk.get("choices", [{}])[0].get("delta", {})
                         content = delta.get("content", "")
 
                         if content:
-                            full_response += content
+                            parts.append(content)
                             yield content
 
                     except json.JSONDecodeError:
                         continue
 
             # Add complete response to history
-            if full_response:
+            if parts:
                 self.conversation_history.append(
-                    {"role": "assistant", "content": full_response}
+                    {"role": "assistant", "content": "".join(parts)}
                 )
 
         except Exception as e:
             logger.error(f"Streaming error: {e}")
             yield "Sorry, there was an error processing your request."
+        finally:
+            response.release()
 
     def clear_conversation(self):
         """Clear conversation history"""
-        self.conversation_history = []
+        self.conversation_history.clear()
         logger.info("Conversation history cleared")
 
     def set_system_prompt(self, prompt: str):
@@ -157,9 +226,9 @@ so avoid using formatting like bullet points or numbered lists unless specifical
     async def health_check(self) -> bool:
         """Check if LLM service is available"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/models") as response:
-                    return response.status == 200
+            session = await self._get_session()
+            async with session.get(f"{self.base_url}/models") as response:
+                return response.status == 200
         except Exception as e:
             logger.error(f"Health check failed: {e}")
             return False
@@ -174,6 +243,7 @@ async def main():
     # Check if service is available
     if not await agent.health_check():
         print("LLM service not available. Make sure Ollama is running.")
+        await agent.aclose()
         return
 
     print("Voice Assistant Ready! (type 'quit' to exit)")
@@ -193,6 +263,8 @@ async def main():
         #     print(chunk, end="", flush=True)
         # print()
 
+    await agent.aclose()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,13 +1,23 @@
 import asyncio
+import aiohttp
 import subprocess
+import sys
 import tempfile
+import atexit
+import hashlib
 import os
+import shutil
+import threading
+import importlib.util
 import logging
 import json
+import re
+import struct
 import wave
 import numpy as np
-from typing import Optional, Callable
+from typing import AsyncGenerator, Optional, Callable
 import io
+from collections import deque
 from config import (
     TTS_MODEL,
     TTS_VOICE,
@@ -15,7 +25,11 @@ from config import (
     PIPER_MODEL_PATH,
     PIPER_VOICE,
     PIPER_CONFIG,
+    PIPER_HTTP_PORT,
 )
+from agents._vad_kernels import float32_to_int16
+from agents._disk_cache import directory_bytes, file_bytes, prune_lru
+from agents._wav import split_wav, wav_header
 
 try:
     import onnxruntime as ort
@@ -27,6 +41,24 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+def _module_available(name: str) -> bool:
+    """Check whether a (possibly dotted) module can be imported"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ImportError:
+        return False
+
+
+# Sentence boundaries for streaming TTS: punctuation followed by whitespace
+_SENTENCE_END = re.compile(r"[.!?]+(?=\s)")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+# Synthesized WAVs cached on disk; least recently used files are pruned
+# once the directory outgrows its budget
+_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "voiceagent", "wav")
+_DISK_CACHE_BYTES = 100 * 1024 * 1024
+
+
 class TTSAgent:
     def __init__(
         self,
@@ -38,141 +70,540 @@ class TTSAgent:
         self.voice = voice
         self.sample_rate = sample_rate
         self.audio_callback: Optional[Callable] = None
+        self.raw_pcm = False
+        self.output_sample_rate = sample_rate
 
-    def set_audio_callback(self, callback: Callable[[bytes], None]):
-        """Set callback for generated audio"""
+        # Probe engines once (PATH lookup, no subprocess) and bind the
+        # implementation so each call skips the checks
+        self._have_piper = (
+            shutil.which("piper") is not None or _module_available("piper")
+        )
+        self._have_piper_http = _module_available("piper.http_server")
+        self._have_piper_persistent = shutil.which("piper") is not None
+        self._have_espeak = shutil.which("espeak") is not None
+        self._tts_impl = self._select_tts_impl()
+
+        # Long-lived Piper process, started on first use so the voice
+        # model is loaded once instead of once per utterance
+        self._piper_proc: Optional[asyncio.subprocess.Process] = None
+
+        # Piper HTTP server (piper-tts package) returns WAV bytes in the
+        # response body, so no file is involved at all
+        self._piper_http_proc: Optional[asyncio.subprocess.Process] = None
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._piper_http_url = f"http://127.0.0.1:{PIPER_HTTP_PORT}/"
+
+        # ONNX Runtime session, built and warmed up once on first use
+        self._onnx_session = None
+
+        # Voice config (sample rate, phoneme map), read once up front
+        self._voice_config = self._load_voice_config()
+        self._char_to_id = self._voice_config.get("phoneme_id_map", {})
+        self._phoneme_lut = self._build_phoneme_lut(self._char_to_id)
+
+        # check_tts_availability result, computed on first call
+        self._availability: Optional[dict] = None
+
+        # One scratch WAV path for the persistent Piper process, overwritten
+        # by each run; the lock serializes synthesis so runs don't collide
+        self._tts_tmp_dir = tempfile.mkdtemp(prefix="tts_")
+        self._tts_tmp_path = os.path.join(self._tts_tmp_dir, "utterance.wav")
+        atexit.register(shutil.rmtree, self._tts_tmp_dir, True)
+        self._synth_lock = asyncio.Lock()
+
+        # Disk cache of finished utterances, sized once up front; its file
+        # I/O runs in worker threads, so the size counter is locked
+        self._cache_dir: Optional[str] = _CACHE_DIR
+        self._disk_cache_bytes = 0
+        self._cache_lock = threading.Lock()
+        try:
+            os.makedirs(_CACHE_DIR, exist_ok=True)
+            self._disk_cache_bytes = directory_bytes(_CACHE_DIR)
+        except OSError as e:
+            logger.warning(f"TTS cache disabled: {e}")
+            self._cache_dir = None
+
+    def set_audio_callback(
+        self, callback: Callable[[bytes], None], raw_pcm: bool = False
+    ):
+        """Set callback for generated audio
+
+        Args:
+            callback: Function receiving audio bytes
+            raw_pcm: Deliver int16 mono PCM at `output_sample_rate` instead of WAV
+        """
         self.audio_callback = callback
+        self.raw_pcm = raw_pcm
+
+    def _select_tts_impl(self) -> Optional[Callable]:
+        """Pick the synthesis method for the configured model"""
+        if self.model not in ("piper", "espeak"):
+            logger.error(f"Unsupported TTS model: {self.model}")
+            return None
+        if self.model == "piper" and self._have_piper:
+            return self._piper_tts
+        if self._have_espeak:
+            return self._espeak_tts
+        logger.error(f"No TTS engine found for model: {self.model}")
+        return None
 
     async def text_to_speech(self, text: str) -> bytes:
         """Convert text to speech and return audio bytes"""
-        if not text.strip():
+        if not text.strip() or self._tts_impl is None:
             return b""
 
+        key = hashlib.sha256(
+            f"{self._tts_impl.__name__}\0{PIPER_VOICE}\0{self.voice}\0{text}".encode()
+        ).hexdigest()
+        audio_data = await asyncio.to_thread(self._cache_get, key)
+        if audio_data:
+            return audio_data
+
         try:
-            if self.model == "piper":
-                return await self._piper_tts(text)
-            elif self.model == "espeak":
-                return await self._espeak_tts(text)
-            else:
-                logger.error(f"Unsupported TTS model: {self.model}")
-                return b""
+            async with self._synth_lock:
+                audio_data = await self._tts_impl(text)
 
         except Exception as e:
             logger.error(f"TTS generation failed: {e}")
-            return b""
+            if self._tts_impl != self._piper_tts or not self._have_espeak:
+                return b""
+            # Not what the key names, so a transient Piper failure isn't
+            # cached under it
+            return await self._espeak_tts(text)
+
+        if audio_data:
+            await asyncio.to_thread(self._cache_put, key, audio_data)
+        return audio_data
+
+    def _cache_get(self, key: str) -> Optional[bytes]:
+        """Cached WAV for key, or None"""
+        if not self._cache_dir:
+            return None
+        path = os.path.join(self._cache_dir, f"{key}.wav")
+        try:
+            with open(path, "rb") as f:
+                audio_data = f.read()
+            # mtime doubles as the LRU timestamp for pruning
+            os.utime(path)
+        except OSError:
+            return None
+        return audio_data
+
+    def _cache_put(self, key: str, audio_data: bytes):
+        """Write a WAV to the cache atomically, pruning if over budget"""
+        if not self._cache_dir:
+            return
+        path = os.path.join(self._cache_dir, f"{key}.wav")
+        try:
+            # A rewrite of an existing key only changes the size by the delta
+            replaced = file_bytes(path)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio_data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"TTS cache write failed: {e}")
+            return
+
+        with self._cache_lock:
+            self._disk_cache_bytes += len(audio_data) - replaced
+            if self._disk_cache_bytes > _DISK_CACHE_BYTES:
+                self._prune_disk_cache()
+
+    def _prune_disk_cache(self):
+        """Delete least recently used files until under 3/4 of the budget"""
+        try:
+            self._disk_cache_bytes = prune_lru(self._cache_dir, _DISK_CACHE_BYTES)
+        except OSError as e:
+            logger.error(f"TTS cache prune failed: {e}")
 
     async def _piper_tts(self, text: str) -> bytes:
-        """Generate speech using Piper TTS"""
+        """Generate speech using Piper TTS
+
+        Errors propagate; text_to_speech falls back to espeak without
+        caching the result under the Piper key.
+        """
+        # Skip ONNX for now due to model complexity. Prefer the Piper
+        # HTTP server, then the persistent CLI process, then one-shot runs
+        if self._have_piper_http:
+            audio_data = await self._piper_http_tts(text)
+            if audio_data:
+                return audio_data
+
+        if self._have_piper_persistent:
+            audio_data = await self._piper_persistent_tts(text)
+            if audio_data:
+                return audio_data
+        return await self._piper_cli_tts(text)
+
+    async def _start_piper_http_server(self) -> bool:
+        """Start the Piper HTTP server and wait until it accepts connections"""
+        if self._piper_http_proc and self._piper_http_proc.returncode is None:
+            return True
+
+        self._piper_http_proc = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "piper.http_server",
+            "--model",
+            os.path.join(PIPER_MODEL_PATH, PIPER_VOICE),
+            "--port",
+            str(PIPER_HTTP_PORT),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+
+        # Readiness probe: the model loads before the port opens
+        for _ in range(100):
+            if self._piper_http_proc.returncode is not None:
+                break
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", PIPER_HTTP_PORT)
+                writer.close()
+                await writer.wait_closed()
+                logger.info(f"Piper HTTP server ready on port {PIPER_HTTP_PORT}")
+                return True
+            except OSError:
+                await asyncio.sleep(0.1)
+
+        logger.warning("Piper HTTP server did not start, using Piper CLI")
+        await self._stop_piper_http_server()
+        self._have_piper_http = False
+        return False
+
+    async def _piper_http_tts(self, text: str) -> bytes:
+        """Synthesize one utterance through the Piper HTTP server"""
+        if not await self._start_piper_http_server():
+            return b""
+
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+
         try:
-            # Skip ONNX for now due to model complexity, use CLI directly
-            return await self._piper_cli_tts(text)
+            async with self._http_session.post(
+                self._piper_http_url, data=text.encode()
+            ) as response:
+                if response.status == 200:
+                    return await response.read()
+                logger.error(f"Piper HTTP error: {response.status}")
+                return b""
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Restart the server on the next call
+            logger.error(f"Piper HTTP request failed: {e}")
+            await self._stop_piper_http_server()
+            return b""
 
-        except Exception as e:
-            logger.error(f"Piper TTS error: {e}")
-            return await self._espeak_tts(text)  # Fallback to espeak
+    async def _stop_piper_http_server(self):
+        """Terminate the Piper HTTP server"""
+        proc, self._piper_http_proc = self._piper_http_proc, None
+        if proc and proc.returncode is None:
+            proc.terminate()
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+
+    async def _start_piper_process(self) -> bool:
+        """Start the persistent Piper process in JSON-input mode"""
+        if self._piper_proc and self._piper_proc.returncode is None:
+            return True
+
+        try:
+            self._piper_proc = await asyncio.create_subprocess_exec(
+                "piper",
+                "--model",
+                os.path.join(PIPER_MODEL_PATH, PIPER_VOICE),
+                "--json-input",
+                "--output_dir",
+                self._tts_tmp_dir,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            logger.info("Started persistent Piper process")
+            return True
+        except FileNotFoundError:
+            logger.debug("piper executable not found for persistent mode")
+            self._piper_proc = None
+            self._have_piper_persistent = False
+            return False
+
+    async def _piper_persistent_tts(self, text: str) -> bytes:
+        """Synthesize one utterance on the persistent Piper process"""
+        if not await self._start_piper_process():
+            return b""
+
+        output_path = self._tts_tmp_path
+        request = {"text": text.replace("\n", " "), "output_file": output_path}
+        # The scratch path is reused; a run that writes nothing must not read
+        # back (and get cached as) the previous utterance
+        try:
+            os.unlink(output_path)
+        except FileNotFoundError:
+            pass
+
+        try:
+            # Piper prints the output path once the line is synthesized
+            self._piper_proc.stdin.write(json.dumps(request).encode() + b"\n")
+            await self._piper_proc.stdin.drain()
+            line = await asyncio.wait_for(
+                self._piper_proc.stdout.readline(), timeout=30
+            )
+        except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError) as e:
+            logger.error(f"Persistent Piper process failed: {e}")
+            await self._stop_piper_process()
+            return b""
+        except asyncio.CancelledError:
+            # The reply line would otherwise be paired with the next request
+            proc, self._piper_proc = self._piper_proc, None
+            if proc and proc.returncode is None:
+                proc.kill()
+            raise
+
+        if not line:
+            logger.error("Persistent Piper process exited")
+            await self._stop_piper_process()
+            return b""
+
+        if not os.path.exists(output_path):
+            return b""
+        with open(output_path, "rb") as f:
+            return f.read()
+
+    async def _stop_piper_process(self):
+        """Terminate the persistent Piper process"""
+        proc, self._piper_proc = self._piper_proc, None
+        if proc and proc.returncode is None:
+            proc.stdin.close()
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+
+    async def aclose(self):
+        """Release the persistent Piper processes and HTTP session"""
+        await self._stop_piper_process()
+        await self._stop_piper_http_server()
+        if self._http_session and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
 
     async def _piper_onnx_tts(self, text: str) -> bytes:
         """Generate speech using Piper ONNX model directly"""
         try:
             model_path = os.path.join(PIPER_MODEL_PATH, PIPER_VOICE)
-            config_path = os.path.join(PIPER_MODEL_PATH, PIPER_CONFIG)
+            config = self._voice_config
 
-            if not os.path.exists(model_path) or not os.path.exists(config_path):
+            if not os.path.exists(model_path) or not config:
                 logger.warning(f"Piper model files not found at {PIPER_MODEL_PATH}")
                 return await self._piper_cli_tts(text)
 
-            # Load model configuration
-            with open(config_path, "r") as f:
-                config = json.load(f)
-
-            # Create ONNX session
-            session = ort.InferenceSession(model_path)
+            # Reuse the optimized ONNX session
+            session = self._get_onnx_session(model_path, config)
 
             # Text preprocessing (simplified)
             # In a full implementation, you'd need proper phonemization
-            text_ids = self._text_to_ids(text, config)
+            text_ids = self._text_to_ids(text)
+            if text_ids.size == 0:
+                return b""
 
-            # Run inference
-            audio = session.run(None, {"input": text_ids})[0]
+            # Run inference off the event loop
+            feed = self._onnx_feed(session, text_ids, config)
+            loop = asyncio.get_running_loop()
+            audio = (await loop.run_in_executor(None, session.run, None, feed))[0]
 
             # Convert to WAV format
-            return self._audio_to_wav(
-                audio, config.get("audio", {}).get("sample_rate", 22050)
-            )
+            return self._audio_to_wav(audio, self._voice_sample_rate())
 
         except Exception as e:
             logger.error(f"Piper ONNX TTS error: {e}")
             return await self._piper_cli_tts(text)
 
-    async def _piper_cli_tts(self, text: str) -> bytes:
-        """Generate speech using Piper CLI"""
+    def _get_onnx_session(self, model_path: str, config: dict):
+        """Create the ONNX Runtime session once, with full graph optimization"""
+        if self._onnx_session is not None:
+            return self._onnx_session
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        available = ort.get_available_providers()
+        providers = [
+            provider
+            for provider in (
+                "TensorrtExecutionProvider",
+                "CUDAExecutionProvider",
+                "CPUExecutionProvider",
+            )
+            if provider in available
+        ]
+        if "TensorrtExecutionProvider" in providers:
+            providers[0] = ("TensorrtExecutionProvider", {"trt_fp16_enable": True})
+
+        on_gpu = providers[0] != "CPUExecutionProvider"
+        variant_path = self._onnx_model_variant(model_path, on_gpu)
         try:
-            # Create temporary file for output
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_path = temp_file.name
+            session = ort.InferenceSession(variant_path, options, providers=providers)
+        except Exception as e:
+            if variant_path == model_path:
+                raise
+            logger.warning(f"Quantized Piper model failed to load, using FP32: {e}")
+            variant_path = model_path
+            session = ort.InferenceSession(model_path, options, providers=providers)
+        logger.info(
+            f"Piper ONNX session created from {os.path.basename(variant_path)} "
+            f"with {session.get_providers()}"
+        )
 
-            # Try different piper command variations
-            piper_commands = [
-                [
-                    "piper",
-                    "--model",
-                    os.path.join(PIPER_MODEL_PATH, PIPER_VOICE),
-                    "--output_file",
-                    temp_path,
-                ],
+        # Warm up kernels and device contexts on a short token sequence
+        warmup_ids = np.ones((1, 8), dtype=np.int64)
+        for _ in range(2):
+            try:
+                session.run(None, self._onnx_feed(session, warmup_ids, config))
+            except Exception as e:
+                logger.debug(f"ONNX warmup failed: {e}")
+                break
+
+        self._onnx_session = session
+        return session
+
+    def _onnx_model_variant(self, model_path: str, on_gpu: bool) -> str:
+        """Pick the FP16 (GPU) or INT8 (CPU) sibling of the model if present"""
+        base, ext = os.path.splitext(model_path)
+        variant = f"{base}.{'fp16' if on_gpu else 'int8'}{ext}"
+        return variant if os.path.exists(variant) else model_path
+
+    def _onnx_feed(self, session, text_ids: np.ndarray, config: dict) -> dict:
+        """Build the input feed for the inputs the Piper model declares"""
+        input_names = {model_input.name for model_input in session.get_inputs()}
+        feed = {"input": text_ids}
+        if "input_lengths" in input_names:
+            lengths = np.full(text_ids.shape[0], text_ids.shape[1], np.int64)
+            feed["input_lengths"] = lengths
+        if "scales" in input_names:
+            inference = config.get("inference", {})
+            feed["scales"] = np.array(
                 [
-                    "python",
-                    "-m",
-                    "piper",
-                    "--model",
-                    os.path.join(PIPER_MODEL_PATH, PIPER_VOICE),
-                    "--output_file",
-                    temp_path,
+                    inference.get("noise_scale", 0.667),
+                    inference.get("length_scale", 1.0),
+                    inference.get("noise_w", 0.8),
                 ],
-                ["piper", "--model", self.voice, "--output_file", temp_path],
-            ]
+                dtype=np.float32,
+            )
+        return feed
 
-            for cmd in piper_commands:
-                try:
-                    # Run piper with text input
-                    process = await asyncio.create_subprocess_exec(
-                        *cmd,
-                        stdin=asyncio.subprocess.PIPE,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                    )
-
-                    stdout, stderr = await process.communicate(input=text.encode())
-
-                    if process.returncode == 0:
-                        # Read generated audio file
-                        if os.path.exists(temp_path):
-                            with open(temp_path, "rb") as f:
-                                audio_data = f.read()
-                            os.unlink(temp_path)  # Clean up temp file
-                            return audio_data
-                    else:
-                        logger.debug(
-                            f"Piper command failed: {' '.join(cmd)}, error: {stderr.decode()}"
-                        )
-
-                except FileNotFoundError:
-                    continue
-
-            logger.error("All Piper TTS commands failed")
-            return b""
+    async def _piper_cli_tts(self, text: str) -> bytes:
+        """Generate speech using Piper CLI"""
+        try:
+            pcm = b"".join([chunk async for chunk in self._piper_raw_stream(text)])
+            if not pcm:
+                return b""
+            return wav_header(len(pcm), self._voice_sample_rate()) + pcm
 
         except Exception as e:
             logger.error(f"Piper CLI TTS error: {e}")
             return b""
 
-    def _text_to_ids(self, text: str, config: dict) -> np.ndarray:
+    async def _piper_raw_stream(self, text: str) -> AsyncGenerator[bytes, None]:
+        """Yield Piper's raw int16 stdout as it is synthesized"""
+        model_path = os.path.join(PIPER_MODEL_PATH, PIPER_VOICE)
+
+        # Try different piper command variations
+        piper_commands = [
+            ["piper", "--model", model_path, "--output_raw"],
+            ["python", "-m", "piper", "--model", model_path, "--output_raw"],
+            ["piper", "--model", self.voice, "--output_raw"],
+        ]
+
+        for cmd in piper_commands:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+            except FileNotFoundError:
+                continue
+
+            process.stdin.write(text.encode())
+            await process.stdin.drain()
+            process.stdin.close()
+
+            produced = False
+            carry = b""
+            try:
+                while True:
+                    chunk = await process.stdout.read(4096)
+                    if not chunk:
+                        break
+                    # Keep whole int16 samples across read boundaries
+                    chunk = carry + chunk
+                    cut = len(chunk) & ~1
+                    carry = chunk[cut:]
+                    if cut:
+                        produced = True
+                        yield chunk[:cut]
+            finally:
+                if process.returncode is None:
+                    try:
+                        process.kill()
+                    except ProcessLookupError:
+                        pass
+                await process.wait()
+
+            if produced:
+                return
+            logger.debug(
+                f"Piper command failed: {' '.join(cmd)}, code: {process.returncode}"
+            )
+
+        logger.error("All Piper TTS commands failed")
+
+    def _load_voice_config(self) -> dict:
+        """Read the Piper voice config, or an empty dict if unavailable"""
+        try:
+            with open(os.path.join(PIPER_MODEL_PATH, PIPER_CONFIG), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Piper voice config unavailable: {e}")
+            return {}
+
+    def _voice_sample_rate(self) -> int:
+        """Sample rate of the configured Piper voice"""
+        return self._voice_config.get("audio", {}).get("sample_rate", 22050)
+
+    def _build_phoneme_lut(self, char_to_id: dict) -> np.ndarray:
+        """ASCII code -> phoneme ID table; -1 marks characters to skip"""
+        lut = np.full(128, -1, dtype=np.int64)
+        lut[ord(" ")] = 0  # Space token
+        for char, phoneme_id in char_to_id.items():
+            if len(char) == 1 and ord(char) < 128:
+                # Piper maps each symbol to a list of IDs
+                if isinstance(phoneme_id, list):
+                    phoneme_id = phoneme_id[0] if phoneme_id else -1
+                lut[ord(char)] = phoneme_id
+        return lut
+
+    def _text_to_ids(self, text: str) -> np.ndarray:
         """Convert text to phoneme IDs (simplified)"""
         # This is a very basic implementation
         # A full implementation would use proper phonemization
-        char_to_id = config.get("phoneme_id_map", {})
+        text = text.lower()
+        if text.isascii():
+            # One gather over the byte codes instead of per-character lookups
+            ids = self._phoneme_lut[np.frombuffer(text.encode("ascii"), np.uint8)]
+            return ids[ids >= 0].reshape(1, -1)
+
+        char_to_id = self._char_to_id
         ids = []
-        for char in text.lower():
+        for char in text:
             if char in char_to_id:
                 ids.append(char_to_id[char])
             elif char == " ":
@@ -181,19 +612,12 @@ class TTSAgent:
 
     def _audio_to_wav(self, audio: np.ndarray, sample_rate: int) -> bytes:
         """Convert audio array to WAV bytes"""
-        # Normalize audio
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767).astype(np.int16)
-
-        # Create WAV file in memory
-        wav_buffer = io.BytesIO()
-        with wave.open(wav_buffer, "wb") as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(sample_rate)
-            wav_file.writeframes(audio_int16.tobytes())
-
-        return wav_buffer.getvalue()
+        # Clip, scale and cast in one pass
+        audio = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+        samples = float32_to_int16(audio, np.empty(audio.size, dtype=np.int16))
+        pcm = samples.tobytes()
+
+        return wav_header(len(pcm), sample_rate) + pcm
         # except FileNotFoundError:
         #     logger.error("Piper TTS not found. Please install piper-tts")
         #     return await self._espeak_tts(text)  # Fallback to espeak
@@ -204,15 +628,10 @@ class TTSAgent:
     async def _espeak_tts(self, text: str) -> bytes:
         """Generate speech using espeak (fallback)"""
         try:
-            # Create temporary file for output
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_path = temp_file.name
-
-            # Run espeak command
+            # Run espeak command, capturing the WAV from stdout
             cmd = [
                 "espeak",
-                "-w",
-                temp_path,
+                "--stdout",
                 "-s",
                 "150",  # Speed
                 "-p",
@@ -232,15 +651,10 @@ class TTSAgent:
                 logger.error(f"espeak failed: {stderr.decode()}")
                 return b""
 
-            # Read generated audio file
-            if os.path.exists(temp_path):
-                with open(temp_path, "rb") as f:
-                    audio_data = f.read()
-                os.unlink(temp_path)  # Clean up temp file
-                return audio_data
-            else:
-                logger.error("espeak output file not found")
+            if len(stdout) <= 44:
+                logger.error("espeak produced no audio")
                 return b""
+            return self._fix_wav_sizes(stdout)
 
         except FileNotFoundError:
             logger.error("espeak not found. Please install espeak")
@@ -249,48 +663,165 @@ class TTSAgent:
             logger.error(f"espeak error: {e}")
             return b""
 
+    def _fix_wav_sizes(self, wav_data: bytes) -> bytes:
+        """Patch RIFF/data sizes of a WAV streamed to a pipe"""
+        # A writer that can't seek back leaves placeholder sizes in the header
+        if wav_data[:4] != b"RIFF" or wav_data[36:40] != b"data":
+            return wav_data
+        data_size = len(wav_data) - 44
+        return b"".join(
+            (
+                wav_data[:4],
+                struct.pack("<I", 36 + data_size),
+                wav_data[8:40],
+                struct.pack("<I", data_size),
+                wav_data[44:],
+            )
+        )
+
+    async def text_to_pcm(self, text: str) -> bytes:
+        """Convert text to raw int16 mono PCM at `output_sample_rate`"""
+        return self._wav_to_pcm(await self.text_to_speech(text))
+
+    def _wav_to_pcm(self, wav_data: bytes) -> bytes:
+        """Strip the WAV container in memory, recording the sample rate"""
+        if not wav_data:
+            return b""
+        split = split_wav(wav_data)
+        if split is not None:
+            pcm, self.output_sample_rate = split
+            return pcm
+        # Non-canonical layouts (extra chunks, other formats) go through wave
+        with wave.open(io.BytesIO(wav_data), "rb") as wav_file:
+            self.output_sample_rate = wav_file.getframerate()
+            return wav_file.readframes(wav_file.getnframes())
+
     async def speak_text(self, text: str):
         """Generate speech and call audio callback"""
-        audio_data = await self.text_to_speech(text)
+        if self._streams_raw_pcm():
+            await self._speak_text_raw(text)
+            return
+        await self._deliver(await self._synthesize(text), text)
+
+    def _streams_raw_pcm(self) -> bool:
+        """Whether utterances go straight from Piper stdout to the callback"""
+        # Only when one-shot CLI runs are the active Piper tier; the HTTP
+        # server and persistent process already avoid per-utterance startup
+        return (
+            self.raw_pcm
+            and self.audio_callback is not None
+            and self._tts_impl == self._piper_tts
+            and not self._have_piper_http
+            and not self._have_piper_persistent
+        )
+
+    async def _speak_text_raw(self, text: str):
+        """Deliver Piper's raw PCM to the callback chunk by chunk"""
+        if not text.strip():
+            return
+
+        produced = False
+        try:
+            async with self._synth_lock:
+                self.output_sample_rate = self._voice_sample_rate()
+                async for chunk in self._piper_raw_stream(text):
+                    produced = True
+                    await self._deliver(chunk, text)
+        except Exception as e:
+            logger.error(f"Piper streaming TTS error: {e}")
+
+        if not produced:
+            await self._deliver(b"", text)
+
+    async def _synthesize(self, text: str) -> bytes:
+        """Synthesize text in the format the audio callback expects"""
+        if self.raw_pcm:
+            return await self.text_to_pcm(text)
+        return await self.text_to_speech(text)
 
+    async def _deliver(self, audio_data: bytes, text: str):
+        """Hand synthesized audio to the audio callback"""
         if audio_data and self.audio_callback:
-            self.audio_callback(audio_data)
+            result = self.audio_callback(audio_data)
+            if asyncio.iscoroutine(result):
+                await result
         elif not audio_data:
             logger.warning(f"No audio generated for text: {text[:50]}...")
 
+    async def _playback_worker(self, audio_q: asyncio.Queue):
+        """Deliver synthesized sentences in order until a None sentinel"""
+        while True:
+            item = await audio_q.get()
+            if item is None:
+                break
+            await self._deliver(*item)
+
     async def speak_text_stream(self, text_stream):
         """Handle streaming text input for TTS"""
         buffer = ""
+        scan_pos = 0
 
-        async for text_chunk in text_stream:
-            buffer += text_chunk
+        # Playback runs in its own task so sentence K plays while K+1 is
+        # synthesized; up to two syntheses are scheduled ahead of it
+        audio_q: asyncio.Queue = asyncio.Queue(maxsize=2)
+        worker = asyncio.create_task(self._playback_worker(audio_q))
+        in_flight = deque()
 
-            # Look for sentence endings to generate speech
-            sentences = self._split_sentences(buffer)
+        async def submit(sentence: str):
+            in_flight.append(
+                (asyncio.create_task(self._synthesize(sentence)), sentence)
+            )
+            if len(in_flight) > 2:
+                await flush_one()
 
-            if len(sentences) > 1:
-                # Process complete sentences
-                for sentence in sentences[:-1]:
-                    if sentence.strip():
-                        await self.speak_text(sentence.strip())
+        async def flush_one():
+            task, sentence = in_flight.popleft()
+            await audio_q.put((await task, sentence))
 
-                # Keep the last incomplete sentence in buffer
-                buffer = sentences[-1]
+        try:
+            async for text_chunk in text_stream:
+                buffer += text_chunk
 
-        # Process any remaining text
-        if buffer.strip():
-            await self.speak_text(buffer.strip())
+                # Only scan text not examined yet for sentence endings
+                last = 0
+                for match in _SENTENCE_END.finditer(buffer, scan_pos):
+                    sentence = buffer[last : match.end()].strip()
+                    if sentence:
+                        await submit(sentence)
+                    last = match.end()
+
+                # Keep the last incomplete sentence in buffer
+                if last:
+                    buffer = buffer[last:]
+
+                # Trailing punctuation ends a sentence only once whitespace
+                # follows, so rescan it with the next chunk
+                scan_pos = len(buffer.rstrip(".!?"))
+
+            # Process any remaining text
+            if buffer.strip():
+                await submit(buffer.strip())
+
+            while in_flight:
+                await flush_one()
+            await audio_q.put(None)
+            await worker
+        finally:
+            for task, _ in in_flight:
+                task.cancel()
+            worker.cancel()
 
     def _split_sentences(self, text: str) -> list:
         """Split text into sentences for streaming TTS"""
-        import re
-
-        # Simple sentence splitting on common punctuation
-        sentences = re.split(r"[.!?]+", text)
-        return sentences
+        # Split after sentence punctuation, keeping it with the sentence;
+        # the last element is the (possibly incomplete) remainder
+        return _SENTENCE_SPLIT.split(text)
 
     async def check_tts_availability(self) -> dict:
         """Check which TTS engines are available"""
+        if self._availability is not None:
+            return dict(self._availability)
+
         available = {}
 
         # Check Piper ONNX models
@@ -301,41 +832,13 @@ class TTSAgent:
         )
         available["piper_onnx"] = piper_onnx_available
 
-        # Check Piper CLI
-        piper_cli_commands = ["piper", "python -m piper"]
-        piper_cli_available = False
-
-        for cmd in piper_cli_commands:
-            try:
-                process = await asyncio.create_subprocess_shell(
-                    f"{cmd} --help",
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                await process.communicate()
-                if process.returncode == 0:
-                    piper_cli_available = True
-                    break
-            except:
-                continue
-
-        available["piper_cli"] = piper_cli_available
-        available["piper"] = piper_onnx_available or piper_cli_available
-
-        # Check espeak
-        try:
-            process = await asyncio.create_subprocess_exec(
-                "espeak",
-                "--help",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            await process.communicate()
-            available["espeak"] = process.returncode == 0
-        except FileNotFoundError:
-            available["espeak"] = False
+        # Piper CLI and espeak were located once at startup
+        available["piper_cli"] = self._have_piper
+        available["piper"] = piper_onnx_available or self._have_piper
+        available["espeak"] = self._have_espeak
 
-        return available
+        self._availability = available
+        return dict(available)
 
 
 # Alternative: Simple TTS using system commands
@@ -402,6 +905,7 @@ async def main():
     # Test TTS
     test_text = "Hello! This is a test of the text to speech system."
     await agent.speak_text(test_text)
+    await agent.aclose()
 
 
 if __name__ == "__main__":
@@ -1,15 +1,78 @@
 import asyncio
 import websockets
 import json
-import base64
 import logging
 import uuid
 import numpy as np
-from typing import Callable, Optional
-from config import WHISPER_LIVE_HOST, WHISPER_LIVE_PORT, SAMPLE_RATE
+from collections import deque
+from typing import Callable, Optional, Union
+from config import (
+    WHISPER_LIVE_HOST,
+    WHISPER_LIVE_PORT,
+    WHISPER_LIVE_SEND_PCM16,
+    WHISPER_LIVE_SEND_QUEUE,
+    WHISPER_LIVE_MAX_FRAME_BYTES,
+    SAMPLE_RATE,
+    CHUNK_SIZE,
+)
+
+try:
+    import orjson
+
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
 logger = logging.getLogger(__name__)
 
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+
+# How long the sender waits to coalesce queued chunks into one WebSocket frame
+_MAX_COALESCE_S = 0.040
+
+# An utterance's transcript is final once it stops changing for this long after
+# all of its audio was sent (longer while nothing has arrived yet), with an
+# overall cap on the wait
+_UTTERANCE_SETTLE_S = 0.8
+_UTTERANCE_FIRST_RESULT_S = 3.0
+_UTTERANCE_TIMEOUT_S = 15.0
+
+# Slack, in seconds, between the end of an utterance's audio and the last
+# segment timestamp the server reports for it (trailing silence isn't covered)
+_UTTERANCE_SLACK_S = 1.5
+
+
+class _Utterance:
+    """Segments the server reports for one utterance of the shared session"""
+
+    def __init__(self, start: float, future: asyncio.Future):
+        self.start = start
+        self.end: Optional[float] = None  # Known once all audio is flushed
+        self.future = future
+        self.timer: Optional[asyncio.TimerHandle] = None
+        # Segment start string -> (start, end, text, completed); the server
+        # resends a segment under the same start as its text grows
+        self.segments = {}
+
+    def text(self) -> str:
+        """Transcript assembled from the segments in stream order"""
+        ordered = sorted(self.segments.values())
+        return " ".join(text for _, _, text, _ in ordered if text)
+
+    def complete(self) -> bool:
+        """Every segment is final and they reach the end of the audio"""
+        if self.end is None or not self.segments:
+            return False
+        values = self.segments.values()
+        return all(completed for *_, completed in values) and (
+            max(end for _, end, _, _ in values) >= self.end - _UTTERANCE_SLACK_S
+        )
+
 
 class WhisperLiveClient:
     def __init__(
@@ -19,6 +82,7 @@ class WhisperLiveClient:
         sample_rate: int = SAMPLE_RATE,
         language: str = "en",
         model: str = "base",
+        send_pcm16: bool = WHISPER_LIVE_SEND_PCM16,
     ):
         self.host = host
         self.port = port
@@ -31,6 +95,23 @@ class WhisperLiveClient:
         self.transcription_callback: Optional[Callable] = None
         self.uid = str(uuid.uuid4())
         self.waiting = False
+        self.send_pcm16 = send_pcm16
+        # Reused float32 scratch backed by a bytearray, so frames can be sent
+        # as a memoryview without a tobytes() copy; grown if a larger chunk
+        # arrives
+        self._float_bytes = bytearray(CHUNK_SIZE * 4)
+        self._float_buf = np.frombuffer(self._float_bytes, dtype=np.float32)
+        self._send_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=WHISPER_LIVE_SEND_QUEUE
+        )
+        self._sender_task: Optional[asyncio.Task] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        # Recent audio held while the server is busy, oldest dropped first
+        self._pending: deque = deque(maxlen=200)
+        # Int16 samples accepted for this session, i.e. the server's stream
+        # clock, and the utterance currently being transcribed
+        self._samples_queued = 0
+        self._utterance: Optional[_Utterance] = None
 
     def set_transcription_callback(self, callback: Callable[[str, bool], None]):
         """Set callback for transcription results
@@ -41,9 +122,16 @@ class WhisperLiveClient:
 
     async def connect(self):
         """Connect to WhisperLive server"""
+        # A reconnect replaces the previous session outright: two senders on
+        # one queue would reorder audio
+        await self._reset_session()
         try:
             # Connect to WhisperLive server
-            self.websocket = await websockets.connect(self.server_url)
+            # Audio frames are high-entropy PCM: deflate costs CPU per frame
+            # for almost no size saving, and bursts shouldn't hit back-pressure
+            self.websocket = await websockets.connect(
+                self.server_url, compression=None, max_size=None, write_limit=2**20
+            )
             self.is_connected = True
             logger.info(f"Connected to WhisperLive server at {self.server_url}")
 
@@ -57,18 +145,47 @@ class WhisperLiveClient:
                 "save_output_recording": False,
                 "log_transcription": True,
             }
-            await self.websocket.send(json.dumps(config_message))
+            # Decoded so the handshake stays a text frame, not a binary one
+            await self.websocket.send(_json_dumps(config_message).decode())
 
-            # Start listening for responses
-            asyncio.create_task(self._listen_for_responses())
+            # Start listening for responses and the coalescing audio sender
+            self._listener_task = asyncio.create_task(self._listen_for_responses())
+            self._sender_task = asyncio.create_task(self._sender_loop())
 
         except Exception as e:
             logger.error(f"Failed to connect to WhisperLive server: {e}")
             self.is_connected = False
             raise
 
+    async def _reset_session(self):
+        """Stop the previous session's tasks and drop its unsent audio"""
+        for task in (self._sender_task, self._listener_task):
+            if task:
+                task.cancel()
+        self._sender_task = None
+        self._listener_task = None
+        self.waiting = False
+        self._pending.clear()
+        # Segment timestamps restart with the server-side session
+        self._samples_queued = 0
+        # Audio queued for the old session; task_done() keeps join() balanced
+        while not self._send_queue.empty():
+            self._send_queue.get_nowait()
+            self._send_queue.task_done()
+        if self.websocket and not self.is_connected:
+            # Half-closed socket left behind by a dropped connection
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+
     async def disconnect(self):
         """Disconnect from WhisperLive server"""
+        for task in (self._sender_task, self._listener_task):
+            if task:
+                task.cancel()
+        self._sender_task = None
+        self._listener_task = None
         if self.websocket and self.is_connected:
             try:
                 await self.websocket.close()
@@ -77,26 +194,180 @@ class WhisperLiveClient:
             except Exception as e:
                 logger.error(f"Error disconnecting: {e}")
 
-    async def send_audio(self, audio_data: bytes):
-        """Send audio data to WhisperLive server"""
+    async def send_audio(
+        self, audio_data: Union[bytes, memoryview], realtime: bool = True
+    ):
+        """Queue audio data for the WhisperLive sender task
+
+        Live capture (realtime=True) drops chunks when the queue is full
+        rather than fall behind; other callers wait for room instead, so a
+        long upload isn't truncated.
+        """
         if not self.is_connected or not self.websocket:
             logger.warning("Not connected to server")
             return
 
+        # Dropped chunks never reach the server, so they're not counted
+        samples = len(audio_data) // 2
         if self.waiting:
-            logger.debug("Server is busy, skipping audio chunk")
+            # Keep recent context to send once the server is ready; copied,
+            # since pooled views don't stay valid for the whole wait
+            if len(self._pending) == self._pending.maxlen:
+                # The append evicts the oldest held chunk, which is never sent
+                self._samples_queued -= len(self._pending[0]) // 2
+            self._pending.append(bytes(audio_data))
+            self._samples_queued += samples
+            return
+
+        if not realtime:
+            await self._send_queue.put(audio_data)
+            self._samples_queued += samples
+            return
+        try:
+            self._send_queue.put_nowait(audio_data)
+            self._samples_queued += samples
+        except asyncio.QueueFull:
+            logger.debug("Send queue full, dropping audio chunk")
+
+    def begin_utterance(self):
+        """Mark the start of an utterance whose transcript finish_utterance returns
+
+        Call before sending the utterance's audio; segments the server
+        reports from this point of the stream on belong to it.
+        """
+        loop = asyncio.get_running_loop()
+        self._cancel_utterance_timer()
+        self._utterance = _Utterance(
+            self._samples_queued / self.sample_rate, loop.create_future()
+        )
+
+    async def finish_utterance(self, timeout: float = _UTTERANCE_TIMEOUT_S) -> str:
+        """Flush the utterance's audio and wait for its final transcript
+
+        The utterance ends when the server has marked every segment completed
+        up to the end of the audio, or when the transcript has stopped
+        changing for _UTTERANCE_SETTLE_S; on timeout whatever arrived is
+        returned.
+        """
+        utterance = self._utterance
+        if utterance is None:
+            raise RuntimeError("finish_utterance() without begin_utterance()")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            # Everything queued must be on the wire before the end is known
+            await asyncio.wait_for(self._send_queue.join(), timeout)
+            utterance.end = self._samples_queued / self.sample_rate
+            self._utterance_updated()
+            return await asyncio.wait_for(
+                utterance.future, max(0.0, deadline - loop.time())
+            )
+        except asyncio.TimeoutError:
+            logger.debug("Timed out waiting for the utterance transcript")
+            return utterance.text()
+        finally:
+            self._cancel_utterance_timer()
+            if self._utterance is utterance:
+                self._utterance = None
+
+    def _utterance_updated(self):
+        """Resolve the utterance if it's complete, else restart its settle timer"""
+        utterance = self._utterance
+        if utterance is None or utterance.end is None or utterance.future.done():
+            return
+        if utterance.complete():
+            self._settle_utterance()
+            return
+        self._cancel_utterance_timer()
+        if utterance.segments:
+            settle = _UTTERANCE_SETTLE_S
+        else:
+            settle = _UTTERANCE_FIRST_RESULT_S
+        utterance.timer = asyncio.get_running_loop().call_later(
+            settle, self._settle_utterance
+        )
+
+    def _settle_utterance(self):
+        """Resolve the pending utterance with the transcript so far"""
+        utterance = self._utterance
+        if utterance is not None and not utterance.future.done():
+            utterance.future.set_result(utterance.text())
+
+    def _cancel_utterance_timer(self):
+        """Stop the pending utterance's settle timer"""
+        if self._utterance is not None and self._utterance.timer is not None:
+            self._utterance.timer.cancel()
+            self._utterance.timer = None
+
+    async def _sender_loop(self):
+        """Drain queued chunks, coalescing up to ~40 ms of them per frame
+
+        A frame is also capped at WHISPER_LIVE_MAX_FRAME_BYTES; the chunk
+        that would overflow it starts the next frame instead.
+        """
+        loop = asyncio.get_running_loop()
+        carry = None
+        while True:
+            chunks = [carry if carry is not None else await self._send_queue.get()]
+            carry = None
+            try:
+                size = len(chunks[0])
+                deadline = loop.time() + _MAX_COALESCE_S
+                while size < WHISPER_LIVE_MAX_FRAME_BYTES:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        chunk = await asyncio.wait_for(
+                            self._send_queue.get(), remaining
+                        )
+                    except asyncio.TimeoutError:
+                        break
+                    if size + len(chunk) > WHISPER_LIVE_MAX_FRAME_BYTES:
+                        carry = chunk
+                        break
+                    chunks.append(chunk)
+                    size += len(chunk)
+
+                # A lone chunk goes out as-is, memoryviews included
+                frame = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+                await self._send_frame(frame)
+            except asyncio.CancelledError:
+                # The carried chunk was taken from the queue as well; on the
+                # normal path it's accounted for as the next frame's first
+                if carry is not None:
+                    self._send_queue.task_done()
+                raise
+            finally:
+                # Also on cancellation, so join() never waits on taken chunks
+                for _ in chunks:
+                    self._send_queue.task_done()
+
+    async def _send_frame(self, audio_data: Union[bytes, memoryview]):
+        """Send one binary audio frame to WhisperLive server"""
+        if not self.is_connected or not self.websocket:
             return
 
         try:
             # WhisperLive expects binary WebSocket frames
-            # Convert to numpy array and ensure correct format
-            audio_np = np.frombuffer(audio_data, dtype=np.int16)
+            if self.send_pcm16:
+                # Server takes int16 directly: half the bytes, no conversion
+                await self.websocket.send(audio_data)
+                return
+
+            # Whole samples only; a trailing odd byte would make frombuffer raise
+            n = len(audio_data) // 2
+            audio_np = np.frombuffer(audio_data, dtype=np.int16, count=n)
+            if n > self._float_buf.size:
+                self._float_bytes = bytearray(n * 4)
+                self._float_buf = np.frombuffer(self._float_bytes, dtype=np.float32)
 
-            # Convert to float32 and normalize to [-1, 1] range
-            audio_float = audio_np.astype(np.float32) / 32768.0
+            # Normalize to [-1, 1] float32 into the reused buffer in one pass
+            np.multiply(audio_np, _INT16_SCALE, out=self._float_buf[:n])
 
-            # Send as binary data (not text)
-            await self.websocket.send(audio_float.tobytes())
+            # Send as binary data (not text); the frame is serialized before
+            # send returns, so the buffer is free for the next chunk
+            await self.websocket.send(memoryview(self._float_bytes)[: n * 4])
 
         except websockets.exceptions.ConnectionClosed:
             logger.info("WebSocket connection closed during audio send")
@@ -113,7 +384,7 @@ class WhisperLiveClient:
         try:
             async for message in self.websocket:
                 try:
-                    data = json.loads(message)
+                    data = _json_loads(message)
                     await self._handle_response(data)
                 except json.JSONDecodeError as e:
                     logger.error(f"Failed to parse server response: {e}")
@@ -127,6 +398,8 @@ class WhisperLiveClient:
         except Exception as e:
             logger.error(f"Error in response listener: {e}")
             self.is_connected = False
+        # No more segments can arrive for an utterance in flight
+        self._settle_utterance()
 
     async def _handle_response(self, data: dict):
         """Handle different types of responses from server"""
@@ -140,8 +413,12 @@ class WhisperLiveClient:
                 logger.info(f"Server busy, waiting {wait_time:.1f} minutes")
 
             elif status == "CONNECTED":
-                self.waiting = False
                 logger.info("Connected to WhisperLive server")
+                # Queue audio held while waiting ahead of anything newer;
+                # send_audio keeps adding to _pending until it is drained
+                while self._pending:
+                    await self._send_queue.put(self._pending.popleft())
+                self.waiting = False
 
         # Handle transcription results
         if "message" in data and isinstance(data["message"], str):
@@ -160,11 +437,42 @@ class WhisperLiveClient:
                         # Check if this is a final segment
                         is_final = segment.get("end", 0) > 0
                         self.transcription_callback(text, is_final)
+            if self._utterance is not None:
+                self._collect_segments(segments)
 
         # Handle uid confirmation
         if "uid" in data and data["uid"] == self.uid:
             logger.debug(f"Received confirmation for UID: {self.uid}")
 
+    def _collect_segments(self, segments: list):
+        """Record the segments that fall inside the pending utterance"""
+        utterance = self._utterance
+        changed = False
+        for segment in segments:
+            try:
+                # WhisperLive formats timestamps as strings
+                start = float(segment.get("start", 0))
+                end = float(segment.get("end", 0))
+            except (TypeError, ValueError):
+                continue
+            # The server resends the previous utterance's last segments too;
+            # a segment belongs to whichever side of the boundary most of it
+            # lies on
+            if (start + end) / 2 < utterance.start:
+                continue
+            entry = (
+                start,
+                end,
+                segment.get("text", "").strip(),
+                bool(segment.get("completed", False)),
+            )
+            key = str(segment.get("start"))
+            if utterance.segments.get(key) != entry:
+                utterance.segments[key] = entry
+                changed = True
+        if changed:
+            self._utterance_updated()
+
     async def start_streaming(self):
         """Start streaming session"""
         if not self.is_connected:
@@ -174,7 +482,11 @@ class WhisperLiveClient:
     async def stop_streaming(self):
         """Stop streaming session"""
         if self.is_connected and self.websocket:
-            # Send end of audio signal
+            # Flush queued audio before the end of audio signal
+            try:
+                await asyncio.wait_for(self._send_queue.join(), timeout=1)
+            except asyncio.TimeoutError:
+                logger.debug("Timed out flushing queued audio")
             await self.websocket.send("END_OF_AUDIO")
             logger.info("Streaming stopped")
 
@@ -192,25 +504,39 @@ class WhisperLiveHTTPClient:
     ):
         self.base_url = f"http://{server_host}:{server_port}"
         self.language = language
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared keep-alive session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def transcribe_audio(self, audio_data: bytes) -> str:
         """Transcribe audio using HTTP endpoint"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # Prepare form data
-                data = aiohttp.FormData()
-                data.add_field("audio", audio_data, content_type="audio/wav")
-                data.add_field("language", self.language)
-
-                async with session.post(
-                    f"{self.base_url}/transcribe", data=data
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("text", "")
-                    else:
-                        logger.error(f"HTTP transcription failed: {response.status}")
-                        return ""
+            session = await self._get_session()
+
+            # Prepare form data
+            data = aiohttp.FormData()
+            data.add_field("audio", audio_data, content_type="audio/wav")
+            data.add_field("language", self.language)
+
+            async with session.post(
+                f"{self.base_url}/transcribe", data=data
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    return result.get("text", "")
+                else:
+                    logger.error(f"HTTP transcription failed: {response.status}")
+                    return ""
 
         except Exception as e:
             logger.error(f"HTTP transcription error: {e}")
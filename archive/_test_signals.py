@@ -0,0 +1,19 @@
+"""
+Shared synthetic signals for the archive test scripts
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=8)
+def sine(sample_rate, duration, frequency, amplitude):
+    """Read-only float32 sine wave, computed once per parameter set"""
+    # Phase in one float32 multiply; sin and the gain are applied in place
+    wave = np.arange(int(sample_rate * duration), dtype=np.float32)
+    wave *= np.float32(2 * np.pi * frequency / sample_rate)
+    np.sin(wave, out=wave)
+    wave *= np.float32(amplitude)
+    wave.flags.writeable = False
+    return wave
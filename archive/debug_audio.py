@@ -5,14 +5,18 @@ Debug audio input and VAD
 
 import asyncio
 import logging
+import math
 import sys
 import numpy as np
 from agents.audio_input import AudioInputAgent
+from agents._vad_kernels import energy_sum_i16
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_INV_FULL_SCALE = 1.0 / 32768.0
+
 
 class AudioDebugger:
     def __init__(self):
@@ -28,8 +32,9 @@ class AudioDebugger:
         # Analyze audio data
         audio_np = np.frombuffer(audio_data, dtype=np.int16)
         if len(audio_np) > 0:
-            energy = np.sqrt(np.mean(audio_np.astype(np.float64) ** 2))
-            normalized_energy = energy / 32768.0
+            # Same int64-accumulated sum of squares the VAD uses; no float64 copy
+            mean_square = energy_sum_i16(audio_np) / len(audio_np)
+            normalized_energy = math.sqrt(mean_square) * _INV_FULL_SCALE
 
             print(
                 f"Chunk {self.audio_chunks_received}: {len(audio_data)} bytes, energy: {normalized_energy:.4f}"
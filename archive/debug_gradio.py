@@ -4,9 +4,48 @@ import logging
 import wave
 import subprocess
 
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# libsndfile subtype -> bytes per sample
+_SUBTYPE_WIDTH = {
+    "PCM_S8": 1,
+    "PCM_U8": 1,
+    "PCM_16": 2,
+    "PCM_24": 3,
+    "PCM_32": 4,
+    "FLOAT": 4,
+    "DOUBLE": 8,
+}
+
+
+def _read_audio_info(audio_file):
+    """Return (format, frames, sample_rate, channels, sample_width)"""
+    if sf is not None:
+        # One libsndfile call parses the whole header
+        info = sf.info(audio_file)
+        return (
+            info.format,
+            info.frames,
+            info.samplerate,
+            info.channels,
+            _SUBTYPE_WIDTH.get(info.subtype, 0),
+        )
+
+    with wave.open(audio_file, "rb") as wav_file:
+        return (
+            "WAV",
+            wav_file.getnframes(),
+            wav_file.getframerate(),
+            wav_file.getnchannels(),
+            wav_file.getsampwidth(),
+        )
+
 
 def debug_audio_file(audio_file):
     """Debug function to inspect audio file details"""
@@ -30,6 +69,13 @@ def debug_audio_file(audio_file):
                     "ffprobe",
                     "-v",
                     "quiet",
+                    # Minimal probing: PCM WAV headers need no deep analysis
+                    "-probesize",
+                    "32",
+                    "-analyzeduration",
+                    "0",
+                    "-fflags",
+                    "nobuffer",
                     "-print_format",
                     "json",
                     "-show_format",
@@ -47,28 +93,26 @@ def debug_audio_file(audio_file):
         except FileNotFoundError:
             logger.info("FFprobe not available")
 
-        # Try to read as WAV file
+        # Try to read the audio header
         try:
-            with wave.open(audio_file, "rb") as wav_file:
-                frames = wav_file.getnframes()
-                sample_rate = wav_file.getframerate()
-                channels = wav_file.getnchannels()
-                sample_width = wav_file.getsampwidth()
-                duration = frames / sample_rate
-
-                info = f"""
+            file_format, frames, sample_rate, channels, sample_width = (
+                _read_audio_info(audio_file)
+            )
+            duration = frames / sample_rate
+
+            info = f"""
 Audio File Information:
 - File path: {audio_file}
 - File size: {file_size} bytes
-- Format: WAV
+- Format: {file_format}
 - Duration: {duration:.2f} seconds
 - Sample rate: {sample_rate} Hz
 - Channels: {channels}
 - Sample width: {sample_width} bytes
 - Total frames: {frames}
 """
-                logger.info(info)
-                return info
+            logger.info(info)
+            return info
 
         except Exception as e:
             logger.error(f"Error reading WAV file: {e}")
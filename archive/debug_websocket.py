@@ -7,9 +7,12 @@ import asyncio
 import websockets
 import json
 import logging
+import os
 import numpy as np
+from _test_signals import sine
 
-logging.basicConfig(level=logging.DEBUG)
+# websockets logs every frame at DEBUG; opt in with LOGLEVEL=DEBUG
+logging.basicConfig(level=os.getenv("LOGLEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +20,13 @@ async def debug_whisperlive_connection():
     """Debug the WebSocket connection to WhisperLive"""
     try:
         print("🔍 Connecting to WhisperLive...")
-        websocket = await websockets.connect("ws://localhost:9091")
+        # PCM is high-entropy: skip permessage-deflate, lift frame/buffer caps
+        websocket = await websockets.connect(
+            "ws://localhost:9091",
+            compression=None,
+            max_size=None,
+            write_limit=2**20,
+        )
         print("✅ Connected!")
 
         # Send configuration
@@ -54,12 +63,10 @@ async def debug_whisperlive_connection():
         print("🎵 Generating test audio...")
         sample_rate = 44100
         duration = 2.0
-        t = np.linspace(0, duration, int(sample_rate * duration))
         frequency = 440  # A4 note
-        audio_data = (np.sin(2 * np.pi * frequency * t) * 16384).astype(np.int16)
 
-        # Convert to float32 like WhisperLive expects
-        audio_float = audio_data.astype(np.float32) / 32768.0
+        # Float32 in [-1, 1] like WhisperLive expects (16384 / 32768 peak)
+        audio_float = sine(sample_rate, duration, frequency, 0.5)
 
         print(
             f"🎵 Audio: {len(audio_float)} samples, range {np.min(audio_float):.3f} to {np.max(audio_float):.3f}"
@@ -89,13 +96,27 @@ async def debug_whisperlive_connection():
         # Start listener
         listen_task = asyncio.create_task(listen_for_responses())
 
-        # Send audio chunks
-        for i in range(0, len(audio_float), chunk_size):
-            chunk = audio_float[i : i + chunk_size]
-            print(f"📤 Sending chunk {i // chunk_size + 1}: {len(chunk)} samples")
-            await websocket.send(chunk.tobytes())
-            await asyncio.sleep(0.1)  # 100ms delay
-
+        # Send audio as byte slices of one view (float32 = 4 bytes), with
+        # several chunks per frame to share one WebSocket header
+        chunks_per_send = 5
+        send_size = chunk_size * chunks_per_send
+        log_every = 10  # frames between progress lines
+        audio_view = memoryview(np.ascontiguousarray(audio_float)).cast("B")
+        loop = asyncio.get_running_loop()
+        next_send = loop.time()
+        sent = 0
+        for i in range(0, len(audio_float), send_size):
+            frame = audio_view[i * 4 : (i + send_size) * 4]
+            await websocket.send(frame)
+            sent += 1
+            if sent % log_every == 0:
+                print(f"📤 Sent {sent} frames")
+            # Pace against a monotonic deadline (100ms per chunk) so sleep
+            # overshoot doesn't accumulate
+            next_send += 0.1 * chunks_per_send
+            await asyncio.sleep(max(0, next_send - loop.time()))
+
+        print(f"📤 Sent {sent} frames in total")
         print("⏳ Waiting for transcription results...")
         await asyncio.sleep(3)
 
@@ -1,5 +1,6 @@
 import gradio as gr
 import asyncio
+import concurrent.futures
 import websockets
 import json
 import logging
@@ -9,40 +10,125 @@ import numpy as np
 import threading
 import time
 import os
-import librosa
+from math import gcd
 from queue import Queue, Empty
 
+try:
+    import orjson
+
+    # orjson parses str or bytes frames; its JSONDecodeError subclasses json's
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+
+try:
+    import soxr
+except ImportError:
+    soxr = None
+    from scipy import signal
+
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def check_services():
-    """Check if required services are running"""
-    status = []
+def resample_to_16k(audio_float, sample_rate):
+    """Resample float32 mono audio to 16kHz"""
+    if sample_rate == 16000:
+        return audio_float
+    if soxr is not None:
+        # SIMD polyphase kernels; quality "QQ" is plenty for speech
+        return soxr.resample(audio_float, sample_rate, 16000, quality="QQ")
+
+    # Polyphase FIR at the reduced integer ratio (1/3 for 48k, 160/441 for 44.1k)
+    g = gcd(16000, sample_rate)
+    resampled = signal.resample_poly(audio_float, 16000 // g, sample_rate // g)
+    return resampled.astype(np.float32, copy=False)
 
-    # Check WhisperLive
+
+# Per-thread float32 scratch that grows to the longest recording seen, so a
+# click doesn't allocate a full-length temporary for the int16 conversion
+_f32 = threading.local()
+
+
+def _to_float32(audio_int16):
+    """int16 samples scaled to [-1, 1) in the reused float32 buffer"""
+    n = audio_int16.size
+    buf = getattr(_f32, "buf", None)
+    if buf is None or buf.size < n:
+        buf = _f32.buf = np.empty(n, dtype=np.float32)
+    out = buf[:n].reshape(audio_int16.shape)
+    # Cast and scale in one pass
+    np.multiply(audio_int16, np.float32(1.0 / 32768.0), out=out)
+    return out
+
+
+def _check_whisperlive():
+    """Status line for the WhisperLive server"""
+    # Literal loopback skips name resolution; the timeout caps a stalled SYN
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        result = sock.connect_ex(("localhost", 9091))
-        sock.close()
-        if result == 0:
-            status.append("✅ WhisperLive server running on port 9091")
-        else:
-            status.append("❌ WhisperLive server not running on port 9091")
-    except Exception as e:
-        status.append(f"❌ Error checking WhisperLive: {e}")
+        with socket.create_connection(("127.0.0.1", 9091), timeout=0.5):
+            return "✅ WhisperLive server running on port 9091"
+    except OSError:
+        return "❌ WhisperLive server not running on port 9091"
+
 
-    # Check Ollama
+def _check_ollama():
+    """Status line for the Ollama server"""
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=2)
+        response = requests.get("http://127.0.0.1:11434/api/tags", timeout=0.5)
         if response.status_code == 200:
-            status.append("✅ Ollama server running on port 11434")
+            return "✅ Ollama server running on port 11434"
         else:
-            status.append("❌ Ollama server not responding")
+            return "❌ Ollama server not responding"
     except Exception as e:
-        status.append("❌ Ollama server not running on port 11434")
+        return "❌ Ollama server not running on port 11434"
 
-    return "\n".join(status)
+
+# Last status report and when it was taken; rapid refreshes reuse it
+_STATUS_TTL_S = 2.0
+_status_cache = (0.0, "")
+
+
+def check_services():
+    """Check if required services are running"""
+    global _status_cache
+    checked_at, report = _status_cache
+    if time.monotonic() - checked_at < _STATUS_TTL_S:
+        return report
+
+    # Both probes block on the network, so run them side by side
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        status = list(
+            executor.map(lambda check: check(), [_check_whisperlive, _check_ollama])
+        )
+
+    report = "\n".join(status)
+    _status_cache = (time.monotonic(), report)
+    return report
+
+
+# COMPLETE configuration like the original client, encoded once; sent as
+# text because WhisperLive reads the config from a text frame
+_WL_CONFIG = {
+    "uid": "gradio_realtime",
+    "language": "en",
+    "task": "transcribe",
+    "model": "base",
+    "use_vad": True,
+    "max_clients": 4,
+    "max_connection_time": 600,
+    "send_last_n_segments": 10,
+    "no_speech_thresh": 0.45,
+    "clip_audio": False,
+    "same_output_threshold": 10,
+}
+_WL_CONFIG_TEXT = _json_dumps(_WL_CONFIG).decode()
 
 
 class WhisperLiveStreamer:
@@ -51,27 +137,23 @@ class WhisperLiveStreamer:
         self.transcription_queue = Queue()
         self.is_connected = False
         self.segments = []
+        # Seconds of audio sent on this connection; segment timestamps are
+        # relative to it, so each request only reads its own segments
+        self.audio_seconds = 0.0
 
     async def connect(self):
         """Connect to WhisperLive with correct configuration"""
         try:
-            self.websocket = await websockets.connect("ws://localhost:9091")
+            # PCM is high-entropy: skip permessage-deflate, lift frame/buffer caps
+            self.websocket = await websockets.connect(
+                "ws://localhost:9091",
+                compression=None,
+                max_size=None,
+                write_limit=2**20,
+            )
 
             # Send COMPLETE configuration like original client
-            config = {
-                "uid": "gradio_realtime",
-                "language": "en",
-                "task": "transcribe",
-                "model": "base",
-                "use_vad": True,
-                "max_clients": 4,
-                "max_connection_time": 600,
-                "send_last_n_segments": 10,
-                "no_speech_thresh": 0.45,
-                "clip_audio": False,
-                "same_output_threshold": 10,
-            }
-            await self.websocket.send(json.dumps(config))
+            await self.websocket.send(_WL_CONFIG_TEXT)
             self.is_connected = True
             logger.info("Connected to WhisperLive with full config")
 
@@ -87,7 +169,7 @@ class WhisperLiveStreamer:
         try:
             async for message in self.websocket:
                 try:
-                    data = json.loads(message)
+                    data = _json_loads(message)
                     if "segments" in data:
                         # Process segments - this is where the transcription comes from!
                         for segment in data["segments"]:
@@ -98,9 +180,16 @@ class WhisperLiveStreamer:
                     pass
         except Exception as e:
             logger.error(f"Listen error: {e}")
+        finally:
+            # Closed or dropped by the server; get_streamer reconnects
+            self.is_connected = False
+
+    async def stream_audio_16k(self, audio_data_16k, realtime=False):
+        """Stream 16kHz audio data to WhisperLive
 
-    async def stream_audio_16k(self, audio_data_16k):
-        """Stream 16kHz audio data to WhisperLive"""
+        Recorded audio is sent as fast as the socket accepts it; with
+        realtime=True sends are paced to the audio clock like a live mic.
+        """
         try:
             # Stream in real-time chunks (16kHz rate)
             chunk_size = int(16000 * 0.1)  # 100ms chunks at 16kHz
@@ -109,11 +198,23 @@ class WhisperLiveStreamer:
                 f"Streaming {len(audio_data_16k)} samples at 16kHz in chunks of {chunk_size}"
             )
 
-            for i in range(0, len(audio_data_16k), chunk_size):
-                chunk = audio_data_16k[i : i + chunk_size]
-                # Send as float32 bytes
-                await self.websocket.send(chunk.astype(np.float32).tobytes())
-                await asyncio.sleep(0.05)  # Real-time simulation
+            # Cast once (a no-op for float32 input) and send float32 byte
+            # slices of one view instead of re-casting every chunk. Two chunks
+            # share each frame (200 ms, well inside the server's VAD window)
+            # to halve framing and send syscalls
+            send_size = chunk_size * 2
+            audio_view = memoryview(
+                np.ascontiguousarray(audio_data_16k, dtype=np.float32)
+            ).cast("B")
+            start = time.monotonic()
+            for i in range(0, len(audio_data_16k), send_size):
+                await self.websocket.send(audio_view[i * 4 : (i + send_size) * 4])
+                if realtime:
+                    # Sleep only while ahead of the samples already sent
+                    ahead = (i + send_size) / 16000 - (time.monotonic() - start)
+                    if ahead > 0:
+                        await asyncio.sleep(ahead)
+            self.audio_seconds += len(audio_data_16k) / 16000
 
         except Exception as e:
             logger.error(f"Streaming error: {e}")
@@ -124,12 +225,14 @@ class WhisperLiveStreamer:
             await self.websocket.close()
             self.is_connected = False
 
-    def get_transcription_text(self):
-        """Get complete transcription from all segments"""
+    def get_transcription_text(self, since=0.0):
+        """Get complete transcription from segments starting at `since` seconds"""
         segments = []
         try:
             while True:
-                segments.append(self.transcription_queue.get_nowait())
+                segment = self.transcription_queue.get_nowait()
+                if float(segment.get("start", 0)) >= since:
+                    segments.append(segment)
         except Empty:
             pass
 
@@ -147,6 +250,22 @@ class WhisperLiveStreamer:
         return ""
 
 
+# One event loop thread and one WhisperLive connection shared by every
+# click, so requests skip the loop setup and the TCP/WebSocket handshake
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, name="whisperlive", daemon=True).start()
+_streamer = None
+
+
+async def get_streamer():
+    """Shared streamer, reconnecting when the socket has closed"""
+    global _streamer
+    if _streamer is None or not _streamer.is_connected:
+        _streamer = WhisperLiveStreamer()
+        await _streamer.connect()
+    return _streamer
+
+
 def process_audio_realtime(audio_input):
     """Process audio with real-time WhisperLive streaming"""
     if audio_input is None:
@@ -164,18 +283,19 @@ def process_audio_realtime(audio_input):
             if len(audio_data) == 0:
                 return "Empty audio recording", "Please record some audio."
 
-            # Check if audio contains actual sound
-            if np.max(np.abs(audio_data)) < 100:
+            # Check if audio contains actual sound. Every 16th sample is plenty
+            # for this coarse threshold; max/min avoid an abs() temporary (and
+            # the int16 overflow of abs(-32768))
+            probe = audio_data[::16]
+            if max(int(probe.max()), -int(probe.min())) < 100:
                 return (
                     "Very quiet audio detected",
                     "Please speak louder or check your microphone.",
                 )
 
             # Convert to float and resample to 16kHz (WhisperLive requirement)
-            audio_float = audio_data.astype(np.float32) / 32768.0
-            audio_16k = librosa.resample(
-                audio_float, orig_sr=sample_rate, target_sr=16000
-            )
+            audio_float = _to_float32(audio_data)
+            audio_16k = resample_to_16k(audio_float, sample_rate)
 
             logger.info(f"Resampled: {len(audio_16k)} samples at 16kHz")
 
@@ -184,27 +304,25 @@ def process_audio_realtime(audio_input):
 
         # Run streaming in async context
         async def run_streaming():
-            streamer = WhisperLiveStreamer()
-            await streamer.connect()
+            streamer = await get_streamer()
 
             if not streamer.is_connected:
                 return "Connection failed", "Could not connect to WhisperLive"
 
+            since = streamer.audio_seconds
             await streamer.stream_audio_16k(audio_16k)
             await asyncio.sleep(3)  # Wait for final results
 
-            transcription = streamer.get_transcription_text()
-            await streamer.disconnect()
-
-            return transcription
+            return streamer.get_transcription_text(since)
 
-        # Run async code
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Run on the shared loop thread; a stuck request is cancelled there
+        # instead of pinning the Gradio worker
+        future = asyncio.run_coroutine_threadsafe(run_streaming(), _loop)
         try:
-            transcription = loop.run_until_complete(run_streaming())
-        finally:
-            loop.close()
+            transcription = future.result(timeout=30)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return "Transcription timed out", "WhisperLive did not respond in time."
 
         if isinstance(transcription, tuple):
             return transcription
@@ -8,7 +8,9 @@ import websockets
 import json
 import logging
 import numpy as np
+from math import gcd
 from scipy import signal
+from _test_signals import sine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,11 +21,11 @@ def resample_audio(audio_data, orig_sr, target_sr):
     if orig_sr == target_sr:
         return audio_data
 
-    ratio = target_sr / orig_sr
-    num_samples = int(len(audio_data) * ratio)
-    resampled = signal.resample(audio_data, num_samples)
+    # Polyphase FIR at the reduced integer ratio (160/441 for 44.1k -> 16k)
+    g = gcd(target_sr, orig_sr)
+    resampled = signal.resample_poly(audio_data, target_sr // g, orig_sr // g)
 
-    return resampled.astype(np.float32)
+    return resampled.astype(np.float32, copy=False)
 
 
 async def test_fixed_whisperlive():
@@ -32,7 +34,13 @@ async def test_fixed_whisperlive():
         print("🔧 Testing fixed WhisperLive integration...")
 
         # Connect to WhisperLive
-        websocket = await websockets.connect("ws://localhost:9091")
+        # PCM is high-entropy: skip permessage-deflate, lift frame/buffer caps
+        websocket = await websockets.connect(
+            "ws://localhost:9091",
+            compression=None,
+            max_size=None,
+            write_limit=2**20,
+        )
         print("✅ Connected!")
 
         # Send complete configuration
@@ -60,9 +68,8 @@ async def test_fixed_whisperlive():
         print("🎵 Generating and resampling test audio...")
         sample_rate = 44100
         duration = 3.0
-        t = np.linspace(0, duration, int(sample_rate * duration))
         frequency = 440  # A4 note
-        audio_44k = (np.sin(2 * np.pi * frequency * t) * 0.5).astype(np.float32)
+        audio_44k = sine(sample_rate, duration, frequency, 0.5)
 
         # Resample to 16kHz using scipy
         audio_16k = resample_audio(audio_44k, sample_rate, 16000)
@@ -94,10 +101,18 @@ async def test_fixed_whisperlive():
         chunk_size = int(16000 * 0.1)  # 100ms chunks at 16kHz
         print(f"📦 Sending audio in chunks of {chunk_size} samples (16kHz)")
 
-        for i in range(0, len(audio_16k), chunk_size):
-            chunk = audio_16k[i : i + chunk_size]
-            await websocket.send(chunk.astype(np.float32).tobytes())
-            await asyncio.sleep(0.05)
+        # Byte slices of one float32 view, no per-chunk copy; several chunks
+        # go in each frame to share one WebSocket header
+        chunks_per_send = 5
+        send_size = chunk_size * chunks_per_send
+        audio_view = memoryview(np.ascontiguousarray(audio_16k)).cast("B")
+        loop = asyncio.get_running_loop()
+        next_send = loop.time()
+        for i in range(0, len(audio_16k), send_size):
+            await websocket.send(audio_view[i * 4 : (i + send_size) * 4])
+            # Monotonic deadline pacing so sleep overshoot doesn't drift
+            next_send += 0.05 * chunks_per_send
+            await asyncio.sleep(max(0, next_send - loop.time()))
 
         print("📤 All audio sent, waiting for transcription...")
         await asyncio.sleep(3)
@@ -4,7 +4,9 @@ Test scipy resampling functionality
 """
 
 import numpy as np
+from math import gcd
 from scipy import signal
+from _test_signals import sine
 
 
 def test_resampling():
@@ -14,17 +16,17 @@ def test_resampling():
     # Create test audio (44.1kHz)
     sample_rate = 44100
     duration = 2.0
-    t = np.linspace(0, duration, int(sample_rate * duration))
     frequency = 440  # A4 note
-    audio_data = (np.sin(2 * np.pi * frequency * t) * 0.5).astype(np.float32)
+    audio_data = sine(sample_rate, duration, frequency, 0.5)
 
     print(f"Original: {len(audio_data)} samples at {sample_rate}Hz")
 
-    # Resample to 16kHz
+    # Resample to 16kHz with a polyphase FIR at the reduced integer ratio
     target_sr = 16000
     ratio = target_sr / sample_rate
-    num_samples = int(len(audio_data) * ratio)
-    resampled = signal.resample(audio_data, num_samples)
+    num_samples = int(np.ceil(len(audio_data) * ratio))
+    g = gcd(target_sr, sample_rate)
+    resampled = signal.resample_poly(audio_data, target_sr // g, sample_rate // g)
 
     print(f"Resampled: {len(resampled)} samples at {target_sr}Hz")
     print(f"Ratio: {ratio:.3f}")
@@ -39,14 +39,12 @@ class STTTester:
         # Setup callbacks
         self.whisper_client.set_transcription_callback(self.transcription_handler)
 
+        # The PyAudio callback runs on its own thread, so bind the loop here
+        loop = asyncio.get_running_loop()
+
         def audio_wrapper(audio_data):
-            try:
-                loop = asyncio.get_running_loop()
-                loop.call_soon_threadsafe(
-                    lambda: asyncio.create_task(self.audio_handler(audio_data))
-                )
-            except RuntimeError:
-                pass
+            # The client converts into its reused float32 scratch buffer
+            asyncio.run_coroutine_threadsafe(self.audio_handler(audio_data), loop)
 
         self.audio_input.set_audio_callback(audio_wrapper)
 
@@ -0,0 +1,36 @@
+"""
+Per-instance TTL memoization for service health probes
+"""
+
+import time
+from functools import wraps
+
+
+def ttl_cache(seconds):
+    """Reuse a probe method's result for `seconds` on the same instance
+
+    Results live in the instance's `_probe_cache` dict keyed by method name,
+    so components with __slots__ must declare that slot.
+    """
+
+    def decorator(method):
+        name = method.__name__
+
+        @wraps(method)
+        def wrapper(self):
+            now = time.monotonic()
+            hit = self._probe_cache.get(name)
+            if hit is not None and now - hit[0] < seconds:
+                return hit[1]
+            value = method(self)
+            self._probe_cache[name] = (now, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_probes(component):
+    """Forget cached probe results so the next check runs for real"""
+    component._probe_cache.clear()
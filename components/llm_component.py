@@ -3,35 +3,104 @@ LLM Component using Ollama
 Clean, reusable LLM functionality
 """
 
+import aiohttp
 import requests
 import logging
 import json
+import socket
+from collections import OrderedDict, deque
+
+from ._ttl import ttl_cache
+
+try:
+    import orjson
+
+    # orjson parses bytes directly; its JSONDecodeError subclasses json's
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
 logger = logging.getLogger(__name__)
 
+# Replies kept for repeated (prompt, history, input) turns
+_RESPONSE_CACHE_ITEMS = 128
+
 
 class LLMComponent:
     """Clean LLM component using Ollama"""
 
-    def __init__(self, host="localhost", port=11434, model="llama3.2"):
+    __slots__ = (
+        "host",
+        "port",
+        "model",
+        "base_url",
+        "_chat_url",
+        "_tags_url",
+        "_body_head",
+        "conversation_history",
+        "_encoded_history",
+        "_encoded_system",
+        "_session",
+        "_aio_session",
+        "_probe_cache",
+        "_response_cache",
+    )
+
+    def __init__(self, host="localhost", port=11434, model="llama3.2", max_turns=10):
         self.host = host
         self.port = port
         self.model = model
         self.base_url = f"http://{host}:{port}"
-        self.conversation_history = []
+        self._chat_url = f"{self.base_url}/api/chat"
+        self._tags_url = f"{self.base_url}/api/tags"
+        self._body_head = self._encode_body_head(model)
+        # Two messages per turn; the oldest fall off automatically
+        self.conversation_history = deque(maxlen=2 * max_turns)
+        # JSON for each history message and the last system prompt, encoded
+        # once so a turn only serializes the new user message
+        self._encoded_history = deque(maxlen=2 * max_turns)
+        self._encoded_system = (None, b"")
+
+        # Keep-alive session so each turn reuses the pooled connection
+        self._session = requests.Session()
+        self._session.mount(
+            "http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        )
 
+        # Async session for agenerate_response, created on first use
+        self._aio_session = None
+        self._probe_cache = {}
+        self._response_cache = OrderedDict()
+
+    def close(self):
+        """Close the pooled HTTP connections"""
+        self._session.close()
+
+    async def aclose(self):
+        """Close the async HTTP session"""
+        if self._aio_session and not self._aio_session.closed:
+            await self._aio_session.close()
+        self._aio_session = None
+
+    @ttl_cache(seconds=5.0)
     def check_server(self):
         """Check if Ollama server is running"""
+        # TCP-only liveness probe like STTComponent; list_models() is the
+        # deeper check when the model list itself matters
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
-            return response.status_code == 200
-        except Exception:
+            with socket.create_connection((self.host, self.port), timeout=0.2):
+                return True
+        except OSError:
             return False
 
     def list_models(self):
         """List available models"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self._session.get(self._tags_url, timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 return [model["name"] for model in data.get("models", [])]
@@ -43,69 +112,39 @@ class LLMComponent:
     def set_model(self, model_name):
         """Set the model to use"""
         self.model = model_name
+        self._body_head = self._encode_body_head(model_name)
         logger.info(f"LLM model set to: {model_name}")
 
     def generate_response(self, user_input, system_prompt=None, stream=False):
         """Generate response from LLM"""
-        try:
-            # Build messages
-            messages = []
-
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-
-            # Add conversation history
-            messages.extend(self.conversation_history)
+        if stream:
+            return self._stream_response(user_input, system_prompt)
 
-            # Add current user input
-            messages.append({"role": "user", "content": user_input})
+        key = self._response_key(user_input, system_prompt)
+        cached = self._cached_response(key, user_input)
+        if cached is not None:
+            return cached
 
-            # Prepare request
-            payload = {"model": self.model, "messages": messages, "stream": stream}
+        try:
+            body = self._chat_body(user_input, system_prompt, stream)
 
-            response = requests.post(
-                f"{self.base_url}/api/chat", json=payload, timeout=30
+            response = self._session.post(
+                self._chat_url,
+                data=body,
+                headers={"Content-Type": "application/json"},
+                timeout=30,
             )
 
             if response.status_code == 200:
-                if stream:
-                    # Handle streaming response
-                    full_response = ""
-                    for line in response.iter_lines():
-                        if line:
-                            try:
-                                data = json.loads(line)
-                                if "message" in data and "content" in data["message"]:
-                                    content = data["message"]["content"]
-                                    full_response += content
-                                    yield content
-                                if data.get("done", False):
-                                    break
-                            except json.JSONDecodeError:
-                                continue
-
-                    # Add to conversation history
-                    self.conversation_history.append(
-                        {"role": "user", "content": user_input}
-                    )
-                    self.conversation_history.append(
-                        {"role": "assistant", "content": full_response}
-                    )
-
-                else:
-                    # Handle non-streaming response
-                    data = response.json()
-                    assistant_response = data["message"]["content"]
-
-                    # Add to conversation history
-                    self.conversation_history.append(
-                        {"role": "user", "content": user_input}
-                    )
-                    self.conversation_history.append(
-                        {"role": "assistant", "content": assistant_response}
-                    )
-
-                    return assistant_response
+                data = response.json()
+                assistant_response = data["message"]["content"]
+
+                # Add to conversation history
+                self._remember("user", user_input)
+                self._remember("assistant", assistant_response)
+
+                self._cache_response(key, assistant_response)
+                return assistant_response
             else:
                 error_msg = f"LLM request failed: {response.status_code}"
                 logger.error(error_msg)
@@ -116,9 +155,156 @@ class LLMComponent:
             logger.error(error_msg)
             return error_msg
 
+    def _stream_response(self, user_input, system_prompt):
+        """Yield response tokens as Ollama streams them"""
+        key = self._response_key(user_input, system_prompt)
+        cached = self._cached_response(key, user_input)
+        if cached is not None:
+            yield cached
+            return
+
+        try:
+            response = self._session.post(
+                self._chat_url,
+                data=self._chat_body(user_input, system_prompt, True),
+                headers={"Content-Type": "application/json"},
+                timeout=30,
+                stream=True,
+            )
+
+            if response.status_code != 200:
+                error_msg = f"LLM request failed: {response.status_code}"
+                logger.error(error_msg)
+                yield f"Error: {error_msg}"
+                return
+
+            full_response = ""
+            # Raw bytes lines; decoded only by the JSON parser
+            for line in response.iter_lines(decode_unicode=False):
+                if line:
+                    try:
+                        data = _json_loads(line)
+                        if "message" in data and "content" in data["message"]:
+                            content = data["message"]["content"]
+                            full_response += content
+                            yield content
+                        if data.get("done", False):
+                            break
+                    except json.JSONDecodeError:
+                        continue
+
+            # Add to conversation history
+            self._remember("user", user_input)
+            self._remember("assistant", full_response)
+            self._cache_response(key, full_response)
+
+        except Exception as e:
+            error_msg = f"LLM error: {str(e)}"
+            logger.error(error_msg)
+            yield error_msg
+
+    def _response_key(self, user_input, system_prompt):
+        """Reply cache key: same model, prompt, history and input"""
+        return (self.model, system_prompt, tuple(self._encoded_history), user_input)
+
+    def _cached_response(self, key, user_input):
+        """Cached reply for key, recorded in the history as a real turn"""
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            self._response_cache.move_to_end(key)
+            self._remember("user", user_input)
+            self._remember("assistant", cached)
+        return cached
+
+    def _cache_response(self, key, response):
+        """Insert into the reply LRU, evicting the oldest entry"""
+        self._response_cache[key] = response
+        if len(self._response_cache) > _RESPONSE_CACHE_ITEMS:
+            self._response_cache.popitem(last=False)
+
+    async def agenerate_response(self, user_input, system_prompt=None):
+        """Stream a response without blocking the event loop"""
+        if self._aio_session is None or self._aio_session.closed:
+            self._aio_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+
+        parts = []
+        try:
+            async with self._aio_session.post(
+                self._chat_url,
+                data=self._chat_body(user_input, system_prompt, stream=True),
+                headers={"Content-Type": "application/json"},
+            ) as response:
+                if response.status != 200:
+                    error_msg = f"LLM request failed: {response.status}"
+                    logger.error(error_msg)
+                    yield f"Error: {error_msg}"
+                    return
+
+                # NDJSON: one object per line, parsed straight from bytes
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    try:
+                        data = _json_loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    content = data.get("message", {}).get("content")
+                    if content:
+                        parts.append(content)
+                        yield content
+                    if data.get("done", False):
+                        break
+
+        except Exception as e:
+            error_msg = f"LLM error: {str(e)}"
+            logger.error(error_msg)
+            yield error_msg
+            return
+
+        self._remember("user", user_input)
+        self._remember("assistant", "".join(parts))
+
+    def _chat_body(self, user_input, system_prompt, stream):
+        """Request body with the system prompt, cached history and user input"""
+        messages = []
+        if system_prompt:
+            messages.append(self._encode_system(system_prompt))
+        messages.extend(self._encoded_history)
+        messages.append(_json_dumps({"role": "user", "content": user_input}))
+
+        return self._body_head[stream] + b",".join(messages) + b"]}"
+
+    def _encode_body_head(self, model):
+        """Pre-encoded request body up to the messages array, per stream flag"""
+        return {
+            stream: b'{"model":'
+            + _json_dumps(model)
+            + b',"stream":'
+            + (b"true" if stream else b"false")
+            + b',"messages":['
+            for stream in (False, True)
+        }
+
+    def _encode_system(self, system_prompt):
+        """JSON for the system message, re-encoded only when the prompt changes"""
+        if self._encoded_system[0] != system_prompt:
+            encoded = _json_dumps({"role": "system", "content": system_prompt})
+            self._encoded_system = (system_prompt, encoded)
+        return self._encoded_system[1]
+
+    def _remember(self, role, content):
+        """Append a message to the history and its cached encoding"""
+        message = {"role": role, "content": content}
+        self.conversation_history.append(message)
+        self._encoded_history.append(_json_dumps(message))
+
     def clear_conversation(self):
         """Clear conversation history"""
-        self.conversation_history = []
+        self.conversation_history.clear()
+        self._encoded_history.clear()
         logger.info("Conversation history cleared")
 
     def get_conversation_length(self):
@@ -127,7 +313,10 @@ class LLMComponent:
 
     def set_conversation_limit(self, max_messages=20):
         """Limit conversation history to prevent context overflow"""
-        if len(self.conversation_history) > max_messages:
-            # Keep system message if present, then recent messages
-            self.conversation_history = self.conversation_history[-max_messages:]
-            logger.info(f"Conversation history trimmed to {max_messages} messages")
+        if max_messages != self.conversation_history.maxlen:
+            # Re-bound the ring, keeping the most recent messages
+            self.conversation_history = deque(
+                self.conversation_history, maxlen=max_messages
+            )
+            self._encoded_history = deque(self._encoded_history, maxlen=max_messages)
+            logger.info(f"Conversation history limited to {max_messages} messages")
@@ -13,12 +13,25 @@ sys.path.append("./WhisperLive")
 
 from whisper_live.client import TranscriptionClient
 
+from ._ttl import ttl_cache
+
 logger = logging.getLogger(__name__)
 
 
 class STTComponent:
     """Clean STT component using WhisperLive"""
 
+    __slots__ = (
+        "host",
+        "port",
+        "client",
+        "is_streaming",
+        "transcription_text",
+        "streaming_thread",
+        "transcription_callback",
+        "_probe_cache",
+    )
+
     def __init__(self, host="localhost", port=9091):
         self.host = host
         self.port = port
@@ -27,6 +40,7 @@ class STTComponent:
         self.transcription_text = ""
         self.streaming_thread = None
         self.transcription_callback = None
+        self._probe_cache = {}
 
     def set_transcription_callback(self, callback):
         """Set callback function for transcription results"""
@@ -42,14 +56,16 @@ class STTComponent:
             if self.transcription_callback:
                 self.transcription_callback(text, segments)
 
+    @ttl_cache(seconds=5.0)
     def check_server(self):
         """Check if WhisperLive server is running"""
+        # Bounded probe: a filtered port fails fast instead of blocking for
+        # the OS connect timeout. TranscriptionClient opens its own socket;
+        # websocket-client already sets TCP_NODELAY on it by default.
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            result = sock.connect_ex((self.host, self.port))
-            sock.close()
-            return result == 0
-        except Exception:
+            with socket.create_connection((self.host, self.port), timeout=1):
+                return True
+        except OSError:
             return False
 
     def start_streaming(self, vad_sensitivity="medium"):
@@ -3,112 +3,528 @@ Text-to-Speech Component using Piper
 Clean, reusable TTS functionality
 """
 
+import atexit
+import hashlib
+import io
 import subprocess
 import logging
+import json
 import os
+import queue
+import re
+import shutil
 import tempfile
-import pygame
 import threading
-import time
+import wave
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from agents._disk_cache import directory_bytes, file_bytes, prune_lru
+from agents._wav import split_wav
+
+from ._ttl import ttl_cache
+
+try:
+    import sounddevice as sd
+
+    SOUNDDEVICE_AVAILABLE = True
+except ImportError:
+    SOUNDDEVICE_AVAILABLE = False
+
+try:
+    from piper import PiperVoice
+
+    PIPER_PYTHON_AVAILABLE = True
+except ImportError:
+    PIPER_PYTHON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# PortAudio callback size in frames (~23 ms at 22050 Hz)
+_BLOCKSIZE = 512
+
+# Synthesized PCM cache: hot entries in memory, the rest on disk with the
+# least recently used files pruned once the directory outgrows its budget
+_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "voiceagent", "tts")
+_MEMORY_CACHE_ITEMS = 64
+_DISK_CACHE_BYTES = 64 * 1024 * 1024
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;:])\s+")
+
+
+def _split_sentences(text):
+    """Yield the non-empty sentences of text"""
+    return (s for s in _SENTENCE_SPLIT.split(text.strip()) if s)
+
 
 class TTSComponent:
     """Clean TTS component using Piper"""
 
-    def __init__(self, model_path="models/piper/en_US-lessac-medium.onnx"):
-        self.model_path = model_path
-        self.is_speaking = False
-        self.audio_queue = []
-        self.speaking_thread = None
+    # Engine probe results, shared by all instances for the process lifetime
+    _availability_cache = {}
 
-        # Initialize pygame mixer for audio playback
-        try:
-            pygame.mixer.init(frequency=22050, size=-16, channels=1, buffer=512)
-            logger.info("Pygame mixer initialized for TTS")
-        except Exception as e:
-            logger.error(f"Failed to initialize pygame mixer: {e}")
+    def __init__(
+        self,
+        model_path="models/piper/en_US-lessac-medium.onnx",
+        cache_dir=_CACHE_DIR,
+        quantized=False,
+    ):
+        self.model_path = model_path
+        self._probe_cache = {}
+        # With quantized=True synthesis runs on the <voice>.int8.onnx sibling
+        # (built on first use); the voice config stays the FP32 model's
+        self._synth_model_path = (
+            self._int8_model_path() if quantized and self.check_model() else model_path
+        )
+        # PCM chunks waiting for the device; the PortAudio callback pops from
+        # the left, producers append on the right. The condition is notified
+        # when the queue drains so blocking playback can wake immediately.
+        self.audio_queue = deque()
+        self._queued_bytes = 0
+        self._queue_cond = threading.Condition()
+
+        # Piper writes every utterance to one scratch file; the PCM is read
+        # back under the Piper lock and written straight to the output stream.
+        # On Linux it is an anonymous memfd that Piper inherits and reopens
+        # through /proc, so nothing touches the filesystem or needs cleanup.
+        self._scratch_fd = None
+        if hasattr(os, "memfd_create"):
+            self._scratch_fd = os.memfd_create("piper-utterance")
+            self._scratch_path = f"/proc/self/fd/{self._scratch_fd}"
+        else:
+            scratch_dir = tempfile.mkdtemp(prefix="tts_")
+            self._scratch_path = os.path.join(scratch_dir, "utterance.wav")
+            atexit.register(shutil.rmtree, scratch_dir, True)
+
+        # One long-lived Piper process in JSON-input mode: the voice model is
+        # loaded once, each utterance is a stdin line, and Piper prints the
+        # output path when done. The lock keeps request/reply lines paired.
+        self._piper_proc = None
+        self._piper_lock = threading.RLock()
+
+        # In-process synthesis through the piper-tts package when installed:
+        # no fork, no pipe, no scratch file. The subprocess is the fallback.
+        self._voice = None
+        if PIPER_PYTHON_AVAILABLE and self.check_model():
+            try:
+                self._voice = PiperVoice.load(
+                    self._synth_model_path, config_path=f"{self.model_path}.json"
+                )
+                logger.info("Loaded Piper voice in-process")
+            except Exception as e:
+                logger.error(f"Failed to load Piper voice in-process: {e}")
+
+        if self._voice is None and shutil.which("piper") and self.check_model():
+            # Load the voice now so the first reply doesn't pay for it
+            try:
+                self._start_piper()
+            except OSError as e:
+                logger.error(f"Failed to start Piper: {e}")
+
+        self.sample_rate = self._voice_sample_rate()
+        self._warmed = False
+
+        # Recurring phrases skip Piper entirely; cache_dir=None keeps the
+        # cache in memory only
+        self._memory_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_dir = cache_dir
+        self._disk_cache_bytes = 0
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                self._disk_cache_bytes = directory_bytes(cache_dir)
+            except OSError as e:
+                logger.error(f"TTS disk cache disabled: {e}")
+                self._cache_dir = None
+
+        # Sentences are synthesized here while earlier ones play; a single
+        # worker keeps utterances in order. stop_speaking bumps the
+        # generation so queued work for older utterances is dropped.
+        self._synth_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="tts-synth"
+        )
+        self._generation = 0
+
+        # One callback-driven PortAudio stream for the component's lifetime;
+        # it plays silence whenever the queue is empty
+        self._stream = None
+        self._silence = bytes(_BLOCKSIZE * 2)
+        if SOUNDDEVICE_AVAILABLE:
+            try:
+                self._stream = sd.RawOutputStream(
+                    samplerate=self.sample_rate,
+                    channels=1,
+                    dtype="int16",
+                    blocksize=_BLOCKSIZE,
+                    callback=self._pa_callback,
+                )
+                self._stream.start()
+                logger.info("sounddevice output stream opened for TTS")
+            except Exception as e:
+                logger.error(f"Failed to open sounddevice output stream: {e}")
+                self._stream = None
+        else:
+            logger.error("sounddevice not available, TTS playback disabled")
 
     def check_piper(self):
         """Check if Piper is available"""
-        try:
-            result = subprocess.run(
-                ["piper", "--help"], capture_output=True, text=True, timeout=5
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
-
+        cache = TTSComponent._availability_cache
+        if "piper" not in cache:
+            # PATH lookup first; only run the binary once if it exists
+            available = PIPER_PYTHON_AVAILABLE
+            if not available and shutil.which("piper"):
+                try:
+                    result = subprocess.run(
+                        ["piper", "--help"], capture_output=True, text=True, timeout=5
+                    )
+                    available = result.returncode == 0
+                except Exception:
+                    pass
+            cache["piper"] = available
+        return cache["piper"]
+
+    @ttl_cache(seconds=5.0)
     def check_model(self):
         """Check if TTS model exists"""
         return os.path.exists(self.model_path)
 
+    def warm_up(self):
+        """Run one throwaway utterance so the first reply skips ONNX warm-up"""
+        if self._warmed:
+            return True
+        if not self.check_model():
+            return False
+        # Bypasses the PCM cache; only the inference itself matters here
+        pcm, message = self._piper_pcm("Hello.")
+        if pcm is None:
+            logger.error(f"TTS warm-up failed: {message}")
+            return False
+        self._warmed = True
+        return True
+
+    def _int8_model_path(self):
+        """Path of the dynamically quantized model, creating it if missing"""
+        base, ext = os.path.splitext(self.model_path)
+        int8_path = f"{base}.int8{ext}"
+        if os.path.exists(int8_path):
+            return int8_path
+
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError:
+            logger.error("onnxruntime.quantization not available, using FP32 model")
+            return self.model_path
+
+        # One-time conversion: int8 weights halve the bandwidth and let the
+        # CPU provider use VNNI/AVX-512 int8 dot products
+        logger.info(f"Quantizing {self.model_path} to int8")
+        try:
+            quantize_dynamic(self.model_path, int8_path, weight_type=QuantType.QInt8)
+        except Exception as e:
+            logger.error(f"Quantization failed, using FP32 model: {e}")
+            return self.model_path
+        return int8_path
+
+    def _voice_sample_rate(self):
+        """Output sample rate from the voice's .onnx.json config"""
+        try:
+            with open(f"{self.model_path}.json") as f:
+                return json.load(f)["audio"]["sample_rate"]
+        except (OSError, ValueError, KeyError):
+            return 22050
+
+    def _start_piper(self):
+        """Start the persistent Piper process if it isn't running"""
+        if self._piper_proc and self._piper_proc.poll() is None:
+            return
+        self._piper_proc = subprocess.Popen(
+            [
+                "piper",
+                "--model",
+                self._synth_model_path,
+                "--config",
+                f"{self.model_path}.json",
+                "--json-input",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+            pass_fds=() if self._scratch_fd is None else (self._scratch_fd,),
+        )
+        logger.info("Started persistent Piper process")
+
+    def _restart_piper(self):
+        """Replace a dead or wedged Piper process"""
+        self.close()
+        self._start_piper()
+
+    def _piper_request(self, text, output_file):
+        """Send one utterance to Piper and wait for its output path"""
+        request = {"text": text.replace("\n", " "), "output_file": output_file}
+        self._piper_proc.stdin.write(json.dumps(request).encode() + b"\n")
+        line = self._piper_proc.stdout.readline()
+        if not line:
+            raise BrokenPipeError("Piper process exited")
+
+    def close(self):
+        """Terminate the persistent Piper process"""
+        proc, self._piper_proc = self._piper_proc, None
+        if proc and proc.poll() is None:
+            proc.stdin.close()
+            try:
+                proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
     def synthesize_to_file(self, text, output_file):
         """Synthesize text to audio file using Piper"""
         try:
             if not self.check_model():
                 return False, f"Model not found: {self.model_path}"
 
-            # Run Piper command
-            cmd = ["piper", "--model", self.model_path, "--output_file", output_file]
-
-            result = subprocess.run(
-                cmd, input=text, text=True, capture_output=True, timeout=30
-            )
-
-            if result.returncode == 0 and os.path.exists(output_file):
+            with self._piper_lock:
+                # A leftover file would pass the exists check below even
+                # if Piper wrote nothing; the memfd is truncated by the caller
+                if self._scratch_fd is None or output_file != self._scratch_path:
+                    try:
+                        os.unlink(output_file)
+                    except FileNotFoundError:
+                        pass
+                self._start_piper()
+                try:
+                    self._piper_request(text, output_file)
+                except (BrokenPipeError, ConnectionResetError) as e:
+                    # Piper crashed between utterances; retry once on a fresh one
+                    logger.error(f"Piper process failed, restarting: {e}")
+                    self._restart_piper()
+                    self._piper_request(text, output_file)
+
+            if os.path.exists(output_file):
                 return True, "TTS synthesis successful"
             else:
-                error_msg = result.stderr or "TTS synthesis failed"
-                logger.error(f"Piper error: {error_msg}")
-                return False, error_msg
+                logger.error("Piper error: no audio written")
+                return False, "TTS synthesis failed"
 
-        except subprocess.TimeoutExpired:
-            return False, "TTS synthesis timeout"
         except Exception as e:
             error_msg = f"TTS error: {str(e)}"
             logger.error(error_msg)
             return False, error_msg
 
+    def synthesize_pcm(self, text):
+        """Synthesize text to raw int16 PCM at self.sample_rate"""
+        key = hashlib.sha1(f"{self._synth_model_path}|{text}".encode()).hexdigest()
+        pcm = self._cache_get(key)
+        if pcm is not None:
+            return pcm, "TTS cache hit"
+
+        pcm, message = self._piper_pcm(text)
+        if pcm:
+            self._cache_put(key, pcm)
+        return pcm, message
+
+    def _cache_get(self, key):
+        """Cached PCM for key from memory, then disk, else None"""
+        with self._cache_lock:
+            pcm = self._memory_cache.get(key)
+            if pcm is not None:
+                self._memory_cache.move_to_end(key)
+                return pcm
+
+        if not self._cache_dir:
+            return None
+        path = os.path.join(self._cache_dir, f"{key}.pcm")
+        try:
+            with open(path, "rb") as f:
+                pcm = f.read()
+            # mtime doubles as the LRU timestamp for pruning
+            os.utime(path)
+        except OSError:
+            return None
+        self._remember_pcm(key, pcm)
+        return pcm
+
+    def _cache_put(self, key, pcm):
+        """Store PCM in memory and on disk"""
+        self._remember_pcm(key, pcm)
+        if not self._cache_dir:
+            return
+
+        path = os.path.join(self._cache_dir, f"{key}.pcm")
+        try:
+            # A rewrite of an existing key only changes the size by the delta
+            replaced = file_bytes(path)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"TTS cache write failed: {e}")
+            return
+
+        with self._cache_lock:
+            self._disk_cache_bytes += len(pcm) - replaced
+            if self._disk_cache_bytes > _DISK_CACHE_BYTES:
+                self._prune_disk_cache()
+
+    def _remember_pcm(self, key, pcm):
+        """Insert into the in-memory LRU, evicting the oldest entry"""
+        with self._cache_lock:
+            self._memory_cache[key] = pcm
+            self._memory_cache.move_to_end(key)
+            if len(self._memory_cache) > _MEMORY_CACHE_ITEMS:
+                self._memory_cache.popitem(last=False)
+
+    def _prune_disk_cache(self):
+        """Delete least recently used files until under 3/4 of the budget"""
+        try:
+            self._disk_cache_bytes = prune_lru(self._cache_dir, _DISK_CACHE_BYTES)
+        except OSError as e:
+            logger.error(f"TTS cache prune failed: {e}")
+
+    def _voice_pcm(self, text):
+        """Synthesize with the in-process Piper voice"""
+        with self._piper_lock:
+            if hasattr(self._voice, "synthesize_stream_raw"):
+                pcm = b"".join(self._voice.synthesize_stream_raw(text))
+            else:
+                # piper1-gpl yields AudioChunk objects instead of raw bytes
+                pcm = b"".join(
+                    chunk.audio_int16_bytes for chunk in self._voice.synthesize(text)
+                )
+        if not pcm:
+            return None, "TTS synthesis failed"
+        return pcm, "TTS synthesis successful"
+
+    def _piper_pcm(self, text):
+        """Run Piper and return the utterance PCM"""
+        if self._voice is not None:
+            try:
+                return self._voice_pcm(text)
+            except Exception as e:
+                logger.error(f"In-process Piper failed: {e}")
+                return None, f"TTS error: {str(e)}"
+
+        with self._piper_lock:
+            if self._scratch_fd is not None:
+                # Empty it first so a failed run can't replay the last utterance
+                os.ftruncate(self._scratch_fd, 0)
+            success, message = self.synthesize_to_file(text, self._scratch_path)
+            if not success:
+                return None, message
+            if self._scratch_fd is None:
+                with open(self._scratch_path, "rb") as f:
+                    wav_data = f.read()
+            else:
+                # Piper reopened the memfd with its own offset; read from 0
+                size = os.fstat(self._scratch_fd).st_size
+                wav_data = os.pread(self._scratch_fd, size, 0)
+
+        if not wav_data:
+            return None, "TTS synthesis failed"
+        parsed = split_wav(wav_data)
+        if parsed is not None:
+            return parsed[0], message
+        with wave.open(io.BytesIO(wav_data), "rb") as wav_file:
+            return wav_file.readframes(wav_file.getnframes()), message
+
     def speak_text(self, text, blocking=False):
         """Convert text to speech and play it"""
         if not text.strip():
             return False, "Empty text"
 
-        try:
-            # Create temporary file for audio
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_path = temp_file.name
+        if not self.check_model():
+            return False, f"Model not found: {self.model_path}"
 
-            # Synthesize speech
-            success, message = self.synthesize_to_file(text, temp_path)
-            if not success:
-                return False, message
+        if self._voice is None and not self.check_piper():
+            return False, "Piper not available"
+
+        if self._stream is None:
+            return False, "No audio output stream"
+
+        try:
+            sentences = _split_sentences(text)
+            generation = self._generation
 
             # Play audio
             if blocking:
-                return self._play_audio_blocking(temp_path)
+                # Synthesis runs one sentence ahead of playback
+                pending = queue.Queue()
+                synthesis = self._synth_executor.submit(
+                    self._synthesize_sentences, sentences, generation, pending.put
+                )
+                synthesis.add_done_callback(lambda _: pending.put(None))
+                success, message = self._play_audio_blocking(iter(pending.get, None))
+                delivered, error = synthesis.result()
+                if success and not delivered and error:
+                    # Every sentence failed; nothing was played
+                    return False, error
+                return success, message
             else:
-                return self._play_audio_async(temp_path)
+                self._synth_executor.submit(
+                    self._synthesize_sentences,
+                    sentences,
+                    generation,
+                    self._play_audio_async,
+                )
+                return True, "Speech queued for playback"
 
         except Exception as e:
             error_msg = f"Speak error: {str(e)}"
             logger.error(error_msg)
             return False, error_msg
 
-    def _play_audio_blocking(self, audio_file):
-        """Play audio file synchronously"""
+    def _synthesize_sentences(self, sentences, generation, deliver):
+        """Synthesize sentence by sentence, handing each PCM to deliver
+
+        Returns how many sentences were delivered and the last error message.
+        """
+        delivered = 0
+        error = None
+        for sentence in sentences:
+            if generation != self._generation:
+                break
+            pcm, message = self.synthesize_pcm(sentence)
+            if pcm is None:
+                logger.error(f"TTS failed: {message}")
+                error = message
+                continue
+            deliver(pcm)
+            delivered += 1
+        return delivered, error
+
+    def _pa_callback(self, outdata, frames, time_info, status):
+        """PortAudio callback: copy queued PCM into the device buffer"""
+        need = frames * 2
+        filled = 0
+        with self._queue_cond:
+            while filled < need and self.audio_queue:
+                chunk = self.audio_queue[0]
+                n = min(len(chunk), need - filled)
+                outdata[filled : filled + n] = chunk[:n]
+                if n == len(chunk):
+                    self.audio_queue.popleft()
+                else:
+                    self.audio_queue[0] = chunk[n:]
+                filled += n
+            if filled:
+                self._queued_bytes -= filled
+                if not self._queued_bytes:
+                    self._queue_cond.notify_all()
+        if filled < need:
+            outdata[filled:need] = self._silence[: need - filled]
+
+    def _play_audio_blocking(self, chunks):
+        """Play audio synchronously"""
         try:
-            pygame.mixer.music.load(audio_file)
-            pygame.mixer.music.play()
+            for pcm in chunks:
+                self._play_audio_async(pcm)
 
-            # Wait for playback to finish
-            while pygame.mixer.music.get_busy():
-                time.sleep(0.1)
-
-            # Clean up
-            os.unlink(audio_file)
+            # The callback notifies once the last queued block is consumed
+            with self._queue_cond:
+                self._queue_cond.wait_for(lambda: not self._queued_bytes)
             return True, "Audio played successfully"
 
         except Exception as e:
@@ -116,56 +532,21 @@ class TTSComponent:
             logger.error(error_msg)
             return False, error_msg
 
-    def _play_audio_async(self, audio_file):
-        """Play audio file asynchronously"""
-        try:
-            self.audio_queue.append(audio_file)
-
-            # Start playback thread if not running
-            if not self.is_speaking:
-                self.speaking_thread = threading.Thread(
-                    target=self._audio_playback_worker, daemon=True
-                )
-                self.speaking_thread.start()
-
-            return True, "Audio queued for playback"
-
-        except Exception as e:
-            error_msg = f"Audio queue error: {str(e)}"
-            logger.error(error_msg)
-            return False, error_msg
-
-    def _audio_playback_worker(self):
-        """Worker thread for audio playback queue"""
-        self.is_speaking = True
-
-        try:
-            while self.audio_queue:
-                audio_file = self.audio_queue.pop(0)
-
-                try:
-                    pygame.mixer.music.load(audio_file)
-                    pygame.mixer.music.play()
-
-                    # Wait for playback to finish
-                    while pygame.mixer.music.get_busy():
-                        time.sleep(0.1)
-
-                    # Clean up
-                    os.unlink(audio_file)
-
-                except Exception as e:
-                    logger.error(f"Playback error: {e}")
-
-        finally:
-            self.is_speaking = False
+    def _play_audio_async(self, pcm):
+        """Queue audio for the output stream"""
+        with self._queue_cond:
+            self.audio_queue.append(memoryview(pcm))
+            self._queued_bytes += len(pcm)
+        return True, "Audio queued for playback"
 
     def stop_speaking(self):
         """Stop current speech and clear queue"""
         try:
-            pygame.mixer.music.stop()
-            self.audio_queue.clear()
-            self.is_speaking = False
+            self._generation += 1
+            with self._queue_cond:
+                self.audio_queue.clear()
+                self._queued_bytes = 0
+                self._queue_cond.notify_all()
             return True, "Speech stopped"
         except Exception as e:
             error_msg = f"Stop error: {str(e)}"
@@ -174,7 +555,7 @@ class TTSComponent:
 
     def is_currently_speaking(self):
         """Check if TTS is currently speaking"""
-        return self.is_speaking or pygame.mixer.music.get_busy()
+        return self._queued_bytes > 0
 
     def get_queue_length(self):
         """Get number of items in audio queue"""
@@ -1,15 +1,26 @@
+"""
+Single source of configuration for the voice agent.
+Host, port and model settings can be overridden from the environment; the
+derived URLs are built once here at import.
+"""
+
 import os
 
 # WhisperLive Configuration
-WHISPER_LIVE_HOST = "localhost"
-WHISPER_LIVE_PORT = 9091  # Using 9091 as 9090 is reserved
+WHISPER_LIVE_HOST = os.getenv("WHISPER_LIVE_HOST", "localhost")
+WHISPER_LIVE_PORT = int(os.getenv("WHISPER_LIVE_PORT", "9091"))  # 9090 is reserved
 WHISPER_LIVE_URL = f"ws://{WHISPER_LIVE_HOST}:{WHISPER_LIVE_PORT}"
+WHISPER_LIVE_SEND_PCM16 = False  # Set if the server accepts raw int16 frames
+# Outbound audio: chunks queued ahead of the sender, and int16 bytes coalesced
+# into one frame at most (float32 doubles it, under the server's 1 MiB limit)
+WHISPER_LIVE_SEND_QUEUE = 64
+WHISPER_LIVE_MAX_FRAME_BYTES = 256 * 1024
 
 # Ollama Configuration (Docker)
-OLLAMA_HOST = "localhost"
-OLLAMA_PORT = 11434  # Default Ollama Docker port
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "localhost")
+OLLAMA_PORT = int(os.getenv("OLLAMA_PORT", "11434"))  # Default Ollama Docker port
 OLLAMA_BASE_URL = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/v1"
-OLLAMA_MODEL = "llama3.2:3b"  # Change to your preferred model
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")  # Or your preferred model
 
 # Audio Configuration
 SAMPLE_RATE = 16000
@@ -22,6 +33,7 @@ TTS_MODEL = "piper"
 PIPER_MODEL_PATH = "./models/piper"
 PIPER_VOICE = "en_US-lessac-medium.onnx"
 PIPER_CONFIG = "en_US-lessac-medium.onnx.json"
+PIPER_HTTP_PORT = 5000  # Local port for the persistent Piper HTTP server
 TTS_VOICE = "en_US-lessac-medium"
 
 # System Configuration
@@ -6,25 +6,32 @@ Docker service checker for Voice Agent System
 import subprocess
 import requests
 import json
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
+INTERFACE_SCRIPTS = (
+    "interfaces/gradio_simple_mic.py",
+    "interfaces/gradio_gentle_vad.py",
+)
 
-def check_docker():
+
+def check_docker(log=print):
     """Check if Docker is running"""
     try:
         result = subprocess.run(["docker", "--version"], capture_output=True, text=True)
         if result.returncode == 0:
-            print("✓ Docker is available")
+            log("✓ Docker is available")
             return True
         else:
-            print("❌ Docker not found")
+            log("❌ Docker not found")
             return False
     except FileNotFoundError:
-        print("❌ Docker not installed")
+        log("❌ Docker not installed")
         return False
 
 
-def check_ollama_container():
+def check_ollama_container(log=print):
     """Check Ollama Docker container"""
     try:
         # Check if container exists and is running
@@ -35,36 +42,34 @@ def check_ollama_container():
         )
 
         if "ollama" in result.stdout:
-            print("✓ Ollama container is running")
+            log("✓ Ollama container is running")
 
             # Test API
             try:
                 response = requests.get("http://localhost:11434/api/tags", timeout=5)
                 if response.status_code == 200:
                     models = response.json().get("models", [])
-                    print(f"✓ Ollama API accessible with {len(models)} models")
+                    log(f"✓ Ollama API accessible with {len(models)} models")
                     for model in models:
-                        print(f"  - {model['name']}")
+                        log(f"  - {model['name']}")
                     return True
                 else:
-                    print("❌ Ollama API not responding correctly")
+                    log("❌ Ollama API not responding correctly")
                     return False
             except requests.exceptions.RequestException as e:
-                print(f"❌ Cannot connect to Ollama API: {e}")
+                log(f"❌ Cannot connect to Ollama API: {e}")
                 return False
         else:
-            print("❌ Ollama container not running")
-            print(
-                "Start with: docker run -d -p 11434:11434 --name ollama ollama/ollama"
-            )
+            log("❌ Ollama container not running")
+            log("Start with: docker run -d -p 11434:11434 --name ollama ollama/ollama")
             return False
 
     except Exception as e:
-        print(f"❌ Error checking Ollama container: {e}")
+        log(f"❌ Error checking Ollama container: {e}")
         return False
 
 
-def check_whisperlive():
+def check_whisperlive(log=print):
     """Check WhisperLive service"""
     import socket
 
@@ -76,40 +81,65 @@ def check_whisperlive():
         sock.close()
 
         if result == 0:
-            print("✓ WhisperLive is running on port 9091")
+            log("✓ WhisperLive is running on port 9091")
             return True
         else:
-            print("❌ WhisperLive not accessible on port 9091")
-            print("Start with: ./start_whisperlive.sh")
+            log("❌ WhisperLive not accessible on port 9091")
+            log("Start with: ./start_whisperlive.sh")
             return False
     except Exception as e:
-        print(f"❌ Error checking WhisperLive: {e}")
-        print("Start with: ./start_whisperlive.sh")
+        log(f"❌ Error checking WhisperLive: {e}")
+        log("Start with: ./start_whisperlive.sh")
         return False
     except requests.exceptions.RequestException:
-        print("❌ WhisperLive not accessible on port 9091")
-        print("Start with: ./start_whisperlive.sh")
+        log("❌ WhisperLive not accessible on port 9091")
+        log("Start with: ./start_whisperlive.sh")
         return False
 
 
+def check_interfaces(log=print):
+    """Check the Gradio interface scripts import when launched directly"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    ok = True
+    for script in INTERFACE_SCRIPTS:
+        result = subprocess.run(
+            [sys.executable, script, "--check"],
+            cwd=root,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode == 0:
+            log(f"✓ {script} imports")
+        else:
+            lines = result.stderr.strip().splitlines()
+            log(f"❌ {script} failed to import: {lines[-1] if lines else 'no output'}")
+            ok = False
+    return ok
+
+
 def main():
     """Main check function"""
     print("Voice Agent System - Service Check")
     print("=" * 40)
 
-    all_good = True
-
-    # Check Docker
-    if not check_docker():
-        all_good = False
-
-    # Check Ollama
-    if not check_ollama_container():
-        all_good = False
+    # The probes are independent and I/O-bound, so run them concurrently;
+    # each collects its lines so the report still prints in order
+    checks = [
+        check_docker,
+        check_ollama_container,
+        check_whisperlive,
+        check_interfaces,
+    ]
+    outputs = [[] for _ in checks]
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        results = list(
+            executor.map(lambda check, out: check(out.append), checks, outputs)
+        )
+    for lines in outputs:
+        for line in lines:
+            print(line)
 
-    # Check WhisperLive
-    if not check_whisperlive():
-        all_good = False
+    all_good = all(results)
 
     print("=" * 40)
     if all_good:
@@ -50,6 +50,8 @@ class VoiceAgent {
         
         try {
             this.websocket = new WebSocket(url);
+            // Reply audio arrives as a binary frame after its response message
+            this.websocket.binaryType = 'arraybuffer';
             
             this.websocket.onopen = () => {
                 console.log(`WebSocket connected to: ${url}`);
@@ -58,6 +60,10 @@ class VoiceAgent {
             };
             
             this.websocket.onmessage = (event) => {
+                if (event.data instanceof ArrayBuffer) {
+                    this.playAudioResponse(new Blob([event.data], { type: 'audio/wav' }));
+                    return;
+                }
                 const data = JSON.parse(event.data);
                 this.handleWebSocketMessage(data);
             };
@@ -83,7 +89,6 @@ class VoiceAgent {
             }, 1000);
         }
     }
-    }
     
     async startRecording() {
         console.log('Start recording clicked');
@@ -190,24 +195,13 @@ class VoiceAgent {
         
         const audioBlob = new Blob(this.audioChunks, { type: 'audio/webm' });
         
-        // Convert to base64 for transmission
-        const reader = new FileReader();
-        reader.onload = () => {
-            const base64Audio = reader.result.split(',')[1];
-            this.sendAudioToAgent(base64Audio);
-        };
-        reader.readAsDataURL(audioBlob);
+        // Send the recording as a binary frame
+        this.sendAudioToAgent(audioBlob);
     }
     
-    sendAudioToAgent(audioData) {
+    sendAudioToAgent(audioBlob) {
         if (this.websocket && this.websocket.readyState === WebSocket.OPEN) {
-            const message = {
-                type: 'audio',
-                data: audioData,
-                timestamp: new Date().toISOString()
-            };
-            
-            this.websocket.send(JSON.stringify(message));
+            this.websocket.send(audioBlob);
             this.updateStatus('Sent to voice agent...', 'processing');
         } else {
             this.updateStatus('Not connected to voice agent', 'ready');
@@ -222,10 +216,8 @@ class VoiceAgent {
                 break;
                 
             case 'response':
+                // data.audio flags a binary WAV frame that follows
                 this.addMessage(data.text, 'agent');
-                if (data.audio) {
-                    this.playAudioResponse(data.audio);
-                }
                 this.updateStatus('Ready to record', 'ready');
                 break;
                 
@@ -257,9 +249,8 @@ class VoiceAgent {
         this.conversation.scrollTop = this.conversation.scrollHeight;
     }
     
-    playAudioResponse(base64Audio) {
+    playAudioResponse(audioBlob) {
         try {
-            const audioBlob = this.base64ToBlob(base64Audio, 'audio/wav');
             const audioUrl = URL.createObjectURL(audioBlob);
             
             const audio = document.createElement('audio');
@@ -280,18 +271,6 @@ class VoiceAgent {
         }
     }
     
-    base64ToBlob(base64, mimeType) {
-        const byteCharacters = atob(base64);
-        const byteNumbers = new Array(byteCharacters.length);
-        
-        for (let i = 0; i < byteCharacters.length; i++) {
-            byteNumbers[i] = byteCharacters.charCodeAt(i);
-        }
-        
-        const byteArray = new Uint8Array(byteNumbers);
-        return new Blob([byteArray], { type: mimeType });
-    }
-    
     updateStatus(message, type) {
         this.status.textContent = message;
         this.status.className = `status ${type}`;
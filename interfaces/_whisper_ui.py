@@ -0,0 +1,337 @@
+"""
+Shared scaffolding for the WhisperLive Gradio interfaces
+Service probe, microphone streamer base class and the common Blocks layout
+"""
+
+import abc
+import asyncio
+import threading
+import logging
+import socket
+import sys
+import time
+from collections import deque
+from functools import partial, wraps
+
+logger = logging.getLogger(__name__)
+
+# whisper_live pulls in torch; imported on the first Start click instead of
+# before the UI can render
+_TranscriptionClient = None
+
+
+def _lazy_client():
+    """Import and cache WhisperLive's TranscriptionClient on first use"""
+    global _TranscriptionClient
+    if _TranscriptionClient is None:
+        # Add WhisperLive to path
+        sys.path.append("./WhisperLive")
+
+        from whisper_live.client import TranscriptionClient
+
+        _TranscriptionClient = TranscriptionClient
+    return _TranscriptionClient
+
+
+def ttl_memoize(seconds):
+    """Reuse a function's result for `seconds` per argument tuple
+
+    Module-level and thread-safe, unlike components._ttl.ttl_cache, which
+    memoizes per instance.
+    """
+
+    def decorator(func):
+        cache = {}
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args):
+            with lock:
+                hit = cache.get(args)
+                if hit is not None and time.monotonic() - hit[0] < seconds:
+                    return hit[1]
+                value = func(*args)
+                cache[args] = (time.monotonic(), value)
+                return value
+
+        return wrapper
+
+    return decorator
+
+
+@ttl_memoize(seconds=2.0)
+def check_services():
+    """Check if required services are running"""
+    status = []
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # An unreachable server shouldn't hold up the status refresh
+        sock.settimeout(0.2)
+        result = sock.connect_ex(("localhost", 9091))
+        sock.close()
+        if result == 0:
+            status.append("✅ WhisperLive server running on port 9091")
+        else:
+            status.append("❌ WhisperLive server not running on port 9091")
+    except Exception as e:
+        status.append(f"❌ Error checking WhisperLive: {e}")
+    return "\n".join(status)
+
+
+class BaseStreamer(abc.ABC):
+    """Microphone streamer keeping its connected client across stop/start
+
+    Only one client is live at a time: each holds a microphone stream, a
+    worker thread and a WhisperLive server slot, so a preset change closes
+    the previous client before connecting a new one.
+    """
+
+    default_preset = None
+
+    def __init__(self):
+        self.client = None
+        self.is_streaming = False
+        # Single-slot publisher shared by the receive and Gradio threads
+        self._transcription = deque(["Ready to start streaming..."], maxlen=1)
+        self._stream_task = None
+        self.preset = self.default_preset
+
+    @property
+    def transcription_text(self):
+        """Latest published transcription"""
+        return self._transcription[-1]
+
+    @transcription_text.setter
+    def transcription_text(self, text):
+        self._transcription.append(text)
+
+    def transcription_callback(self, text, segments):
+        """Callback function to handle transcription results"""
+        # Repeated partials are common; republish only when the text changed
+        if text and not text.isspace() and text != self.transcription_text:
+            self.transcription_text = text
+            # Skip formatting partials nobody will see
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Transcription: {text}")
+
+    @abc.abstractmethod
+    def get_vad_settings(self, preset):
+        """Client VAD keyword arguments for a preset"""
+
+    def describe(self, preset):
+        """Suffix naming the preset in status messages"""
+        return ""
+
+    async def start_streaming(self, preset=None):
+        """Start real-time microphone transcription"""
+        if self.is_streaming:
+            return "Already streaming", self.transcription_text
+
+        if preset is None:
+            preset = self.default_preset
+        suffix = self.describe(preset)
+        try:
+            live = self._stream_task is not None and not self._stream_task.done()
+            if live and preset != self.preset:
+                # Different VAD settings need a new client; free this one's
+                # mic stream and server slot first
+                error = self._close_client()
+                if error:
+                    logger.error(f"Failed to close previous client: {error}")
+                live = False
+
+            self.preset = preset
+            if not live:
+                self.transcription_text = f"Initializing WhisperLive client{suffix}..."
+                self.client, self._stream_task = await self._create_client(preset)
+
+            # A paused client is still connected; just let its frames through
+            self.is_streaming = True
+            self.transcription_text = (
+                f"🎤 Listening{suffix}... Speak into your microphone!"
+            )
+
+            return f"🎤 Started microphone streaming{suffix}", self.transcription_text
+
+        except Exception as e:
+            logger.error(f"Failed to start streaming: {e}")
+            self.is_streaming = False
+            self.transcription_text = f"Error: {str(e)}"
+            return f"❌ Error: {str(e)}", self.transcription_text
+
+    async def _create_client(self, preset):
+        """Connect a client for this preset and start its microphone loop"""
+        # The import and the websocket handshake both block, so keep them off
+        # the event loop
+        client = await asyncio.to_thread(self._connect, preset)
+
+        # A paused client keeps its connection but drops frames
+        send = client.multicast_packet
+
+        def gated_send(packet, unconditional=False):
+            if unconditional or (self.is_streaming and self.client is client):
+                send(packet, unconditional)
+
+        client.multicast_packet = gated_send
+
+        # The blocking microphone loop runs in a worker thread owned by a
+        # task on this loop; calling client() with no parameters reads the mic
+        task = asyncio.create_task(asyncio.to_thread(client))
+        task.add_done_callback(partial(self._stream_done, client))
+        return client, task
+
+    def _connect(self, preset):
+        """Construct a TranscriptionClient with this preset's VAD settings"""
+        return _lazy_client()(
+            host="localhost",
+            port=9091,
+            lang="en",
+            translate=False,
+            model="base",
+            use_vad=True,
+            save_output_recording=False,
+            log_transcription=False,
+            transcription_callback=self.transcription_callback,
+            **self.get_vad_settings(preset),
+        )
+
+    def _stream_done(self, client, task):
+        """Record how a client's microphone loop ended, on the loop thread"""
+        if task.cancelled():
+            return
+        e = task.exception()
+        if e is not None:
+            logger.error(f"Streaming error: {e}")
+            self.transcription_text = f"Streaming error: {e}"
+            if self.client is client:
+                self.is_streaming = False
+
+    def stop_streaming(self):
+        """Pause real-time transcription, keeping the client connected"""
+        if not self.is_streaming:
+            return "Not streaming", self.transcription_text
+
+        self.is_streaming = False
+        self.transcription_text = "⏹️ Streaming stopped"
+        return "⏹️ Stopped transcription", self.transcription_text
+
+    def _close_client(self):
+        """Close the live client and its connection; returns an error or None"""
+        client, task = self.client, self._stream_task
+        self.is_streaming = False
+        self.client = None
+        self._stream_task = None
+        if client is None:
+            return None
+        task.cancel()
+        try:
+            # Closing the sockets is what unblocks the worker thread
+            client.close_all_clients()
+        except Exception as e:
+            return str(e)
+        return None
+
+    async def release_clients(self):
+        """Close the live client and its connection"""
+        error = self._close_client()
+        if error:
+            logger.error(f"Failed to release client: {error}")
+            return f"❌ Error: {error}", self.transcription_text
+        self.transcription_text = "⏹️ Streaming stopped"
+        return "🔌 Released WhisperLive client", self.transcription_text
+
+    def get_transcription(self):
+        """Get current transcription text"""
+        return self.transcription_text
+
+
+def build_blocks(
+    title,
+    streamer,
+    heading,
+    subtitle,
+    start_label,
+    placeholder,
+    usage_steps,
+    extra_controls=None,
+    extra_info=None,
+):
+    """Build the shared Gradio layout around a streamer
+
+    extra_controls() runs inside the control column and returns the inputs
+    passed to start_streaming; extra_info() renders below the columns.
+    """
+    # Imported here so loading the streamers doesn't pull in gradio
+    import gradio as gr
+
+    with gr.Blocks(title=title, theme=gr.themes.Soft()) as app:
+        gr.Markdown(heading)
+        gr.Markdown(subtitle)
+
+        with gr.Row():
+            with gr.Column():
+                # Service status
+                status_display = gr.Textbox(
+                    label="Service Status",
+                    value=check_services(),
+                    interactive=False,
+                    lines=2,
+                )
+
+                start_inputs = extra_controls() if extra_controls else []
+
+                # Control buttons
+                with gr.Row():
+                    start_btn = gr.Button(start_label, variant="primary")
+                    stop_btn = gr.Button("⏹️ Stop Streaming", variant="secondary")
+                    release_btn = gr.Button("🔌 Release Client", variant="secondary")
+
+                # Status messages
+                status_output = gr.Textbox(
+                    label="Status",
+                    value="Ready to start...",
+                    lines=2,
+                )
+
+            with gr.Column():
+                # Live transcription display
+                transcription_output = gr.Textbox(
+                    label="🎯 Live Transcription",
+                    value=placeholder,
+                    lines=10,
+                    max_lines=20,
+                )
+
+                # Manual refresh button
+                refresh_btn = gr.Button("🔄 Refresh Transcription")
+
+        if extra_info:
+            extra_info()
+
+        # Usage instructions
+        steps = [
+            "Make sure WhisperLive server is running: "
+            "`python WhisperLive/run_server.py --port 9091 --backend faster_whisper`",
+            *usage_steps,
+            "Click 'Refresh Transcription' to see latest results",
+            "Click 'Stop Streaming' to pause; the connection is kept",
+            "Click 'Release Client' to disconnect when done",
+        ]
+        gr.Markdown("### 🎯 Usage:")
+        for number, step in enumerate(steps, 1):
+            gr.Markdown(f"{number}. {step}")
+
+        # Connect button handlers
+        outputs = [status_output, transcription_output]
+        start_btn.click(
+            fn=streamer.start_streaming, inputs=start_inputs, outputs=outputs
+        )
+        stop_btn.click(fn=streamer.stop_streaming, outputs=outputs)
+        release_btn.click(fn=streamer.release_clients, outputs=outputs)
+        refresh_btn.click(fn=streamer.get_transcription, outputs=[transcription_output])
+
+        # Add refresh button for status
+        refresh_status_btn = gr.Button("🔄 Refresh Service Status")
+        refresh_status_btn.click(fn=check_services, outputs=[status_display])
+
+    return app
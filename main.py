@@ -8,52 +8,109 @@ import asyncio
 import logging
 import signal
 import sys
+import time
 from typing import Optional
 
-# Import all agents
+# Import all agents; the WhisperLive client and TTS stack are imported in
+# VoiceAgent so loading this module stays cheap
 from agents.audio_input import AudioInputAgent
-from agents.whisper_live_client import WhisperLiveClient
 from agents.llm_agent import LLMAgent
-from agents.tts_agent import TTSAgent, SimpleTTSAgent
 from agents.audio_output import AudioOutputAgent
+from agents._audio_ring import AudioRing
 
 # Import configuration
-from config import DEBUG, LOG_LEVEL
+from config import DEBUG, LOG_LEVEL, CHUNK_SIZE
+
+# Microphone ring: ~2 s of 16-bit audio, forwarded two chunks at a time, or
+# after 50 ms when a burst ends short of a full batch
+_AUDIO_RING_BYTES = 1 << 16
+_AUDIO_BATCH_BYTES = 2 * CHUNK_SIZE * 2
+_AUDIO_FLUSH_S = 0.050
+
+
+async def _queue_iter(queue: asyncio.Queue):
+    """Yield items from a queue until the None sentinel"""
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        yield item
+
+
+async def pipe_llm_to_tts(llm, tts, user_input: str):
+    """Stream LLM tokens into sentence-level TTS so speech starts early"""
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async for token in llm.generate_response_stream(user_input):
+                await queue.put(token)
+        finally:
+            await queue.put(None)
+
+    if hasattr(tts, "speak_text_stream"):
+        producer = asyncio.create_task(produce())
+        try:
+            await tts.speak_text_stream(_queue_iter(queue))
+            await producer
+        finally:
+            # A TTS failure must also stop the LLM stream, which would
+            # otherwise keep filling a queue nobody reads
+            if not producer.done():
+                producer.cancel()
+                await asyncio.wait([producer])
+    else:
+        # Simple TTS can only speak whole texts
+        await produce()
+        tokens = [token async for token in _queue_iter(queue)]
+        await tts.speak_text("".join(tokens))
 
 
 class VoiceAgent:
     def __init__(self):
+        from agents.whisper_live_client import WhisperLiveClient
+        from agents.tts_agent import TTSAgent
+
         # Initialize all agents
         self.audio_input = AudioInputAgent()
         self.whisper_client = WhisperLiveClient()
         self.llm_agent = LLMAgent()
         self.tts_agent = TTSAgent()
         self.audio_output = AudioOutputAgent()
+        self._audio_ring = AudioRing(_AUDIO_RING_BYTES, _AUDIO_BATCH_BYTES)
+        self._drain_task: Optional[asyncio.Task] = None
 
         # State management
         self.is_running = False
         self.is_listening = True
         self.current_transcription = ""
         self.conversation_active = False
+        # Last partial written to the console, to skip unchanged repeats
+        self._last_partial_text = ""
+        self._last_partial_ts = 0.0
+        # start() sleeps on this until shutdown() or a signal sets it
+        self._shutdown_event = asyncio.Event()
 
         # Setup callbacks
         self._setup_callbacks()
 
     def _setup_callbacks(self):
         """Setup callbacks between agents"""
-        # Audio input -> WhisperLive
-        self.audio_input.set_audio_callback(self._handle_audio_input)
+        # Audio input -> ring buffer (plain copy on the audio thread)
+        self.audio_input.set_audio_callback(self._audio_ring.write)
 
         # WhisperLive -> LLM
         self.whisper_client.set_transcription_callback(self._handle_transcription)
 
-        # TTS -> Audio output
-        self.tts_agent.set_audio_callback(self._handle_tts_audio)
+        # TTS -> Audio output (raw PCM, no WAV container)
+        self.tts_agent.set_audio_callback(self._handle_tts_audio, raw_pcm=True)
 
-    async def _handle_audio_input(self, audio_data: bytes):
-        """Handle audio input from microphone"""
-        if self.is_listening and self.whisper_client.is_connected:
-            await self.whisper_client.send_audio(audio_data)
+    async def _drain_audio(self):
+        """Forward batched microphone audio from the ring to WhisperLive"""
+        while True:
+            audio_data = await self._audio_ring.get(_AUDIO_FLUSH_S)
+            if self.is_listening and self.whisper_client.is_connected:
+                await self.whisper_client.send_audio(audio_data)
 
     async def _handle_transcription(self, text: str, is_final: bool):
         """Handle transcription from WhisperLive"""
@@ -70,9 +127,15 @@ class VoiceAgent:
             # Resume listening
             self.is_listening = True
         else:
-            # Show partial transcription
-            if DEBUG and text.strip():
-                print(f"[Partial] {text}", end="\r")
+            # Show partial transcription, at most every 100 ms and only when
+            # it changed
+            if DEBUG and text != self._last_partial_text and text.strip():
+                now = time.monotonic()
+                if now - self._last_partial_ts >= 0.1:
+                    self._last_partial_text = text
+                    self._last_partial_ts = now
+                    sys.stdout.write(f"[Partial] {text}\r")
+                    sys.stdout.flush()
 
     async def _process_user_input(self, text: str):
         """Process user input and generate response"""
@@ -80,18 +143,20 @@ class VoiceAgent:
             # Check for exit commands
             if text.lower().strip() in ["exit", "quit", "goodbye", "stop"]:
                 await self.tts_agent.speak_text("Goodbye!")
-                await asyncio.sleep(2)  # Wait for TTS to complete
+                # Resolves once the farewell has actually played
+                await self.audio_output.drained()
                 await self.shutdown()
                 return
 
-            # Generate LLM response
+            # Stream LLM response into TTS sentence by sentence
             logger.info("Generating response...")
-            response = await self.llm_agent.generate_response(text)
+            await pipe_llm_to_tts(self.llm_agent, self.tts_agent, text)
 
-            if response:
-                logger.info(f"Assistant: {response}")
-                # Convert to speech
-                await self.tts_agent.speak_text(response)
+            # The user turn is appended first, so an assistant entry after
+            # it means a response was produced
+            history = self.llm_agent.conversation_history
+            if history and history[-1]["role"] == "assistant":
+                logger.info(f"Assistant: {history[-1]['content']}")
             else:
                 logger.warning("No response generated")
 
@@ -100,8 +165,10 @@ class VoiceAgent:
             await self.tts_agent.speak_text("Sorry, I had trouble processing that.")
 
     async def _handle_tts_audio(self, audio_data: bytes):
-        """Handle audio from TTS agent"""
-        await self.audio_output.play_audio(audio_data)
+        """Handle raw PCM audio from TTS agent"""
+        await self.audio_output.play_pcm(
+            audio_data, self.tts_agent.output_sample_rate
+        )
 
     async def start(self):
         """Start the voice agent system"""
@@ -119,8 +186,10 @@ class VoiceAgent:
             await self.whisper_client.connect()
             await self.whisper_client.start_streaming()
 
-            # Start audio input
+            # Start audio input; one task drains the ring into WhisperLive
             logger.info("Starting audio input...")
+            self._audio_ring.bind(asyncio.get_running_loop())
+            self._drain_task = asyncio.create_task(self._drain_audio())
             self.audio_input.start_recording()
 
             self.is_running = True
@@ -132,8 +201,7 @@ class VoiceAgent:
             )
 
             # Keep running until shutdown
-            while self.is_running:
-                await asyncio.sleep(0.1)
+            await self._shutdown_event.wait()
 
         except Exception as e:
             logger.error(f"Failed to start voice agent: {e}")
@@ -151,6 +219,8 @@ class VoiceAgent:
         tts_available = await self.tts_agent.check_tts_availability()
         if not any(tts_available.values()):
             logger.warning("No TTS engines available, falling back to simple TTS")
+            from agents.tts_agent import SimpleTTSAgent
+
             self.tts_agent = SimpleTTSAgent()
             self.tts_agent.set_audio_callback(self._handle_tts_audio)
 
@@ -162,10 +232,14 @@ class VoiceAgent:
 
         self.is_running = False
         self.is_listening = False
+        self._shutdown_event.set()
 
         try:
             # Stop audio input
             self.audio_input.stop_recording()
+            if self._drain_task:
+                self._drain_task.cancel()
+                self._drain_task = None
 
             # Stop WhisperLive
             await self.whisper_client.stop_streaming()
@@ -175,6 +249,11 @@ class VoiceAgent:
             self.audio_output.stop_all_audio()
             self.audio_output.cleanup()
 
+            # Release the LLM HTTP session and persistent TTS process
+            await self.llm_agent.aclose()
+            if hasattr(self.tts_agent, "aclose"):
+                await self.tts_agent.aclose()
+
             logger.info("Voice Agent System shutdown complete")
 
         except Exception as e:
@@ -183,6 +262,10 @@ class VoiceAgent:
 
 # Setup logging
 def setup_logging():
+    # Configure the root logger once; a second set of handlers would emit
+    # every record twice
+    if logging.getLogger().handlers:
+        return
     level = getattr(logging, LOG_LEVEL.upper(), logging.INFO)
     logging.basicConfig(
         level=level,
@@ -199,20 +282,23 @@ logger = logging.getLogger(__name__)
 
 # Signal handlers for graceful shutdown
 voice_agent_instance: Optional[VoiceAgent] = None
+main_loop: Optional[asyncio.AbstractEventLoop] = None
 
 
 def signal_handler(signum, frame):
     """Handle shutdown signals"""
     logger.info(f"Received signal {signum}, shutting down...")
-    if voice_agent_instance:
-        asyncio.create_task(voice_agent_instance.shutdown())
+    if voice_agent_instance and main_loop:
+        # Wake start(); main() then runs the teardown on the loop
+        main_loop.call_soon_threadsafe(voice_agent_instance._shutdown_event.set)
 
 
 async def main():
     """Main entry point"""
-    global voice_agent_instance
+    global voice_agent_instance, main_loop
 
     setup_logging()
+    main_loop = asyncio.get_running_loop()
 
     # Setup signal handlers
     signal.signal(signal.SIGINT, signal_handler)
@@ -242,6 +328,14 @@ if __name__ == "__main__":
     print("=" * 40)
     print("Starting system...")
 
+    try:
+        import uvloop
+
+        # libuv event loop for the WebSocket, HTTP and subprocess traffic
+        uvloop.install()
+    except ImportError:
+        pass
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
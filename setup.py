@@ -3,10 +3,12 @@
 Setup script for Local Voice Agent System
 """
 
+import shlex
 import subprocess
 import sys
 import os
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 
 def run_command(cmd, description):
@@ -35,10 +37,18 @@ def check_dependencies():
         "git": "git --version",
     }
 
-    missing = []
-    for name, cmd in dependencies.items():
-        if not run_command(cmd, f"Checking {name}"):
-            missing.append(name)
+    # Each check is an independent subprocess; run them side by side
+    with ThreadPoolExecutor() as ex:
+        results = dict(
+            zip(
+                dependencies,
+                ex.map(
+                    lambda item: run_command(item[1], f"Checking {item[0]}"),
+                    dependencies.items(),
+                ),
+            )
+        )
+    missing = [name for name, ok in results.items() if not ok]
 
     if missing:
         print(f"Missing dependencies: {', '.join(missing)}")
@@ -63,11 +73,22 @@ def install_python_packages():
         "openai",
         "onnxruntime",
         "wave",
+        "orjson",
     ]
-
-    for package in packages:
-        if not run_command(f"pip install {package}", f"Installing {package}"):
-            print(f"Warning: Failed to install {package}")
+    if sys.platform != "win32":
+        packages.append("uvloop")
+
+    # One resolver run for the whole set; per-package only to find the culprit
+    batch = " ".join(shlex.quote(p) for p in packages)
+    if not run_command(
+        f"pip install --prefer-binary {batch}", "Installing Python packages"
+    ):
+        for package in packages:
+            if not run_command(
+                f"pip install --prefer-binary {shlex.quote(package)}",
+                f"Installing {package}",
+            ):
+                print(f"Warning: Failed to install {package}")
 
     return True
 
@@ -124,7 +145,25 @@ def check_audio_devices():
         return False
 
 
-def setup_piper_tts():
+async def download_file(session, url, filepath):
+    """Stream a URL to disk, keeping nothing at the final path if it fails"""
+    partial = filepath + ".part"
+    try:
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            with open(partial, "wb") as f:
+                async for chunk in resp.content.iter_chunked(1 << 20):
+                    f.write(chunk)
+        os.replace(partial, filepath)
+        return True
+    except Exception as e:
+        print(f"✗ Downloading {os.path.basename(filepath)} failed: {e}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return False
+
+
+async def setup_piper_tts():
     """Setup Piper TTS models"""
     print("\nSetting up Piper TTS...")
 
@@ -138,16 +177,39 @@ def setup_piper_tts():
         "en_US-lessac-medium.onnx.json": "https://huggingface.co/rhasspy/piper-voices/resolve/v1.0.0/en/en_US/lessac/medium/en_US-lessac-medium.onnx.json",
     }
 
+    pending = {}
     for filename, url in piper_models.items():
         filepath = os.path.join(models_dir, filename)
         if not os.path.exists(filepath):
             print(f"Downloading {filename}...")
-            if not run_command(f"wget -O {filepath} {url}", f"Downloading {filename}"):
-                print(f"Warning: Failed to download {filename}")
-                print(f"You can manually download from: {url}")
+            pending[filename] = (url, filepath)
         else:
             print(f"✓ {filename} already exists")
 
+    if pending:
+        try:
+            # Installed by install_python_packages, so imported only here
+            import aiohttp
+        except ImportError:
+            print("aiohttp is not installed; cannot download Piper models")
+            results = [False] * len(pending)
+        else:
+            # Fetch the model and its config concurrently over one session
+            async with aiohttp.ClientSession() as session:
+                results = await asyncio.gather(
+                    *(
+                        download_file(session, url, filepath)
+                        for url, filepath in pending.values()
+                    )
+                )
+
+        for (filename, (url, _)), ok in zip(pending.items(), results):
+            if ok:
+                print(f"✓ Downloaded {filename}")
+            else:
+                print(f"Warning: Failed to download {filename}")
+                print(f"You can manually download from: {url}")
+
     # Try to install piper-tts package
     run_command("pip install piper-tts", "Installing piper-tts package")
 
@@ -261,7 +323,7 @@ def main():
     setup_whisperlive()
 
     # Setup Piper TTS
-    setup_piper_tts()
+    asyncio.run(setup_piper_tts())
 
     # Check audio devices
     check_audio_devices()
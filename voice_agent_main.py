@@ -4,12 +4,28 @@ Clean, unified voice conversation system
 """
 
 import logging
-import time
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from components import STTComponent, LLMComponent, TTSComponent
+from components._ttl import invalidate_probes
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# A sentence ends at terminal punctuation followed by whitespace
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Collapsed when comparing transcripts for repeats
+_WHITESPACE = re.compile(r"\s+")
+
+# Recent accepted inputs a new transcript is checked against
+_RECENT_INPUTS = 5
+
+# Prefixes LLMComponent uses for failures reported in place of a token
+_LLM_ERRORS = ("Error:", "LLM error:")
+
 
 class VoiceAgent:
     """Main voice agent that coordinates STT, LLM, and TTS"""
@@ -25,6 +41,10 @@ class VoiceAgent:
         self.conversation_active = False
         self.last_user_input = ""
         self.last_ai_response = ""
+        # Normalized forms of recently accepted inputs
+        self._recent_inputs = deque(maxlen=_RECENT_INPUTS)
+        # Set whenever last_user_input or last_ai_response changes
+        self.status_changed = threading.Event()
 
         # Settings
         self.vad_sensitivity = "medium"
@@ -32,15 +52,38 @@ class VoiceAgent:
             "You are a helpful AI assistant. Keep responses concise and conversational."
         )
 
+        # LLM turns run here so the STT callback thread keeps ingesting
+        # audio; one worker keeps turns in order
+        self._llm_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="llm-turn"
+        )
+
+        # Service probes are independent I/O waits; run them side by side
+        self._probe_executor = ThreadPoolExecutor(
+            max_workers=5, thread_name_prefix="service-probe"
+        )
+
         # Set up STT callback
         self.stt.set_transcription_callback(self._on_speech_detected)
 
     def check_all_services(self):
         """Check if all required services are running"""
-        status = {}
-        status["stt"] = self.stt.check_server()
-        status["llm"] = self.llm.check_server()
-        status["tts"] = self.tts.check_piper() and self.tts.check_model()
+        probes = {
+            "stt": self.stt.check_server,
+            "llm": self.llm.check_server,
+        }
+        # TTS is ready when Piper and the model are there; the voice is warmed
+        # in the same round so the first reply doesn't pay for it
+        tts_probes = (self.tts.check_piper, self.tts.check_model, self.tts.warm_up)
+
+        # Total wait is the slowest probe rather than the sum
+        futures = {
+            service: self._probe_executor.submit(probe)
+            for service, probe in probes.items()
+        }
+        tts_futures = [self._probe_executor.submit(probe) for probe in tts_probes]
+        status = {service: future.result() for service, future in futures.items()}
+        status["tts"] = all([future.result() for future in tts_futures])
 
         all_ready = all(status.values())
         return all_ready, status
@@ -80,6 +123,9 @@ class VoiceAgent:
         self.tts.stop_speaking()
 
         self.conversation_active = False
+        # A restart should see the services as they are now
+        for component in (self.stt, self.llm, self.tts):
+            invalidate_probes(component)
         logger.info("Voice conversation stopped")
         return True, "Conversation stopped"
 
@@ -88,45 +134,78 @@ class VoiceAgent:
         if not self.conversation_active:
             return
 
-        # Filter out very short or repetitive text
-        if len(text.strip()) < 3 or text == self.last_user_input:
+        # Filter out very short or repetitive text; WhisperLive re-sends
+        # finals that differ only in case, spacing or trailing punctuation
+        if len(text.strip()) < 3:
+            return
+        key = self._input_key(text)
+        if key in self._recent_inputs:
             return
 
+        self._recent_inputs.append(key)
         self.last_user_input = text
+        self.status_changed.set()
         logger.info(f"User said: {text}")
 
-        # Generate AI response
-        self._generate_and_speak_response(text)
+        # Generate AI response off the STT thread
+        self._llm_executor.submit(self._generate_and_speak_response, text)
+
+    @staticmethod
+    def _input_key(text):
+        """Normalize a transcript for duplicate detection"""
+        return _WHITESPACE.sub(" ", text.strip().lower()).rstrip(" .,!?")
 
     def _generate_and_speak_response(self, user_input):
         """Generate LLM response and speak it"""
         try:
-            # Generate response
+            # Stream the response and queue each sentence for TTS as soon as
+            # it's complete, so synthesis overlaps the rest of the generation
             logger.info("Generating AI response...")
-            ai_response = self.llm.generate_response(
-                user_input, system_prompt=self.system_prompt
+            tokens = self.llm.generate_response(
+                user_input, system_prompt=self.system_prompt, stream=True
             )
 
-            if ai_response and not ai_response.startswith("Error:"):
+            parts = []
+            pending = ""
+            for token in tokens:
+                # Failures are yielded in place of a token, also after part of
+                # the reply has streamed; nothing more is spoken or recorded
+                if token.startswith(_LLM_ERRORS):
+                    logger.error(f"LLM failed: {token}")
+                    return
+                parts.append(token)
+                pending += token
+                *sentences, pending = _SENTENCE_END.split(pending)
+                for sentence in sentences:
+                    self._speak(sentence)
+            self._speak(pending)
+
+            ai_response = "".join(parts)
+            if ai_response:
                 self.last_ai_response = ai_response
+                self.status_changed.set()
                 logger.info(f"AI response: {ai_response}")
-
-                # Speak response
-                success, message = self.tts.speak_text(ai_response, blocking=False)
-                if not success:
-                    logger.error(f"TTS failed: {message}")
             else:
-                logger.error(f"LLM failed: {ai_response}")
+                logger.error("LLM failed: empty response")
 
         except Exception as e:
             logger.error(f"Response generation error: {e}")
 
+    def _speak(self, sentence):
+        """Queue one sentence behind any speech already pending"""
+        if sentence.strip():
+            success, message = self.tts.speak_text(sentence, blocking=False)
+            if not success:
+                logger.error(f"TTS failed: {message}")
+
     def send_text_message(self, text):
         """Send text message (for testing without STT)"""
         if not self.conversation_active:
             return False, "Conversation not active"
 
-        self._generate_and_speak_response(text)
+        # Same worker as spoken turns, so the two never share the LLM history
+        # at once; the caller still returns once the turn is done
+        self._llm_executor.submit(self._generate_and_speak_response, text).result()
         return True, "Message sent"
 
     def get_conversation_status(self):
@@ -144,6 +223,7 @@ class VoiceAgent:
         """Clear conversation history"""
         self.llm.clear_conversation()
         self.last_user_input = ""
+        self._recent_inputs.clear()
         self.last_ai_response = ""
         return True, "Conversation cleared"
 
@@ -183,8 +263,12 @@ if __name__ == "__main__":
             print("Press Ctrl+C to stop")
 
             try:
+                # Print only when a turn actually changed something; the
+                # timeout just keeps Ctrl+C responsive
                 while True:
-                    time.sleep(1)
+                    if not agent.status_changed.wait(timeout=5):
+                        continue
+                    agent.status_changed.clear()
                     status = agent.get_conversation_status()
                     if status["last_user_input"]:
                         print(f"Last heard: {status['last_user_input']}")
@@ -2,139 +2,328 @@ import asyncio
 import websockets
 import json
 import base64
-import tempfile
-import os
 from pathlib import Path
 import logging
+import sys
+from collections import OrderedDict
+from typing import Optional
 from agents.whisper_live_client import WhisperLiveClient
 from agents.llm_agent import LLMAgent
 from agents.tts_agent import TTSAgent
 
+try:
+    import orjson
+
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> str:
+        # Text frames: the frontend JSON.parse()s string messages
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bytes of 16 kHz int16 PCM handed to the WhisperLive client per send_audio
+_SEND_CHUNK_BYTES = 32768
+
+# Recent replies whose WAV bytes are kept in memory
+_SPEECH_CACHE_ITEMS = 32
+
+# Utterances waiting in front of each pipeline stage
+_STAGE_QUEUE_MAX = 2
+
+# Largest WebSocket frame accepted from the browser
+_MAX_MESSAGE_BYTES = 8 * 1024 * 1024
+
+# Oldest interpreter the web server runs on
+_MIN_PYTHON = (3, 11)
+
 
 class WebVoiceAgent:
     def __init__(self):
         self.whisper_client = WhisperLiveClient()
         self.llm_agent = LLMAgent()
         self.tts_agent = TTSAgent()
-
-    async def process_audio(self, audio_data):
+        # Stage queues: utterances move STT -> LLM -> TTS, bounded so a burst
+        # of uploads waits at the door instead of piling up mid-pipeline
+        self._stt_queue: asyncio.Queue = asyncio.Queue(maxsize=_STAGE_QUEUE_MAX)
+        self._llm_queue: asyncio.Queue = asyncio.Queue(maxsize=_STAGE_QUEUE_MAX)
+        self._tts_queue: asyncio.Queue = asyncio.Queue(maxsize=_STAGE_QUEUE_MAX)
+        self._pipeline_task: Optional[asyncio.Task] = None
+        # WAV bytes of recent replies, oldest evicted first
+        self._speech_cache: OrderedDict = OrderedDict()
+
+    async def process_audio(self, audio_bytes: bytes):
         """Process audio data through the voice agent pipeline"""
         try:
-            # Decode base64 audio
-            audio_bytes = base64.b64decode(audio_data)
+            # Decode the webm recording to 16 kHz mono PCM in memory
+            pcm = await self.decode_audio(audio_bytes)
+            if not pcm:
+                return {"error": "Audio conversion failed"}
+
+            # Hand the utterance to the stage pipeline and wait for its turn
+            # to come out of the TTS stage
+            self._ensure_pipeline()
+            result = asyncio.get_running_loop().create_future()
+            await self._stt_queue.put({"pcm": pcm, "result": result})
+            return await result
 
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as temp_file:
-                temp_file.write(audio_bytes)
-                temp_audio_path = temp_file.name
+        except Exception as e:
+            logger.error(f"Error processing audio: {e}")
+            return {"error": str(e)}
 
+    def _ensure_pipeline(self):
+        """Start the stage workers on first use, or after they stopped"""
+        if self._pipeline_task is None or self._pipeline_task.done():
+            self._pipeline_task = asyncio.create_task(self.run_pipeline())
+
+    async def run_pipeline(self):
+        """Run the transcribe, LLM and TTS stages side by side
+
+        Each stage handles one utterance at a time, in order, so the shared
+        WhisperLive session and conversation history stay consistent while
+        different utterances occupy different stages.
+        """
+        async with asyncio.TaskGroup() as tg:
+            # Transcription always runs to completion: abandoning it midway
+            # would leave the shared WhisperLive session mid-utterance
+            tg.create_task(self._run_stage(self._stt_queue, self._stage_stt))
+            tg.create_task(
+                self._run_stage(self._llm_queue, self._stage_llm, cancellable=True)
+            )
+            tg.create_task(
+                self._run_stage(self._tts_queue, self._stage_tts, cancellable=True)
+            )
+
+    async def _run_stage(self, queue: asyncio.Queue, stage, cancellable=False):
+        """Feed jobs from queue through stage, failing only the bad job
+
+        A job whose caller went away (its result future was cancelled) is
+        skipped, and with cancellable=True also interrupted mid-stage.
+        """
+        while True:
+            job = await queue.get()
+            result = job["result"]
+            if result.done():
+                continue
+            task = asyncio.create_task(stage(job))
+
+            def abandon(fut, task=task):
+                if fut.cancelled():
+                    task.cancel()
+
+            if cancellable:
+                result.add_done_callback(abandon)
             try:
-                # Convert webm to wav for processing
-                wav_path = temp_audio_path.replace(".webm", ".wav")
-                os.system(
-                    f'ffmpeg -i "{temp_audio_path}" -ar 16000 -ac 1 "{wav_path}" -y 2>/dev/null'
-                )
-
-                if not os.path.exists(wav_path):
-                    return {"error": "Audio conversion failed"}
-
-                # Transcribe audio
-                transcription = await self.transcribe_audio_file(wav_path)
-                if not transcription:
-                    return {"error": "No speech detected"}
-
-                # Get LLM response
-                llm_response = await self.llm_agent.get_response(transcription)
-
-                # Generate TTS audio
-                tts_audio_path = await self.tts_agent.generate_speech(llm_response)
-
-                # Read TTS audio and encode to base64
-                audio_response = None
-                if tts_audio_path and os.path.exists(tts_audio_path):
-                    with open(tts_audio_path, "rb") as f:
-                        audio_response = base64.b64encode(f.read()).decode()
-                    os.unlink(tts_audio_path)  # Clean up
-
-                return {
-                    "transcription": transcription,
-                    "response": llm_response,
+                await task
+            except asyncio.CancelledError:
+                # Shutting the pipeline down, rather than dropping this job
+                if asyncio.current_task().cancelling():
+                    raise
+                logger.info("Dropped a turn whose connection closed")
+            except Exception as e:
+                logger.error(f"Error processing audio: {e}")
+                if not result.done():
+                    result.set_result({"error": str(e)})
+            finally:
+                result.remove_done_callback(abandon)
+
+    async def _stage_stt(self, job: dict):
+        """Transcribe audio"""
+        job["transcription"] = await self.transcribe_pcm(job["pcm"])
+        if not job["transcription"]:
+            if not job["result"].done():
+                job["result"].set_result({"error": "No speech detected"})
+            return
+        await self._llm_queue.put(job)
+
+    async def _stage_llm(self, job: dict):
+        """Get LLM response"""
+        job["response"] = await self.llm_agent.generate_response(job["transcription"])
+        await self._tts_queue.put(job)
+
+    async def _stage_tts(self, job: dict):
+        """Generate TTS audio"""
+        audio_response = await self.speech(job["response"])
+        if not job["result"].done():
+            job["result"].set_result(
+                {
+                    "transcription": job["transcription"],
+                    "response": job["response"],
                     "audio": audio_response,
                 }
+            )
 
-            finally:
-                # Clean up temp files
-                for path in [temp_audio_path, wav_path]:
-                    if os.path.exists(path):
-                        os.unlink(path)
+    async def speech(self, text: str) -> Optional[bytes]:
+        """Synthesize text to WAV bytes"""
+        wav_bytes = self._speech_cache.get(text)
+        if wav_bytes is not None:
+            self._speech_cache.move_to_end(text)
+            return wav_bytes
 
-        except Exception as e:
-            logger.error(f"Error processing audio: {e}")
-            return {"error": str(e)}
+        wav_bytes = await self.tts_agent.text_to_speech(text)
+        if not wav_bytes:
+            return None
 
-    async def transcribe_audio_file(self, audio_path):
-        """Transcribe audio file using WhisperLive"""
+        # Repeated replies skip synthesis and the TTS disk cache read
+        self._speech_cache[text] = wav_bytes
+        if len(self._speech_cache) > _SPEECH_CACHE_ITEMS:
+            self._speech_cache.popitem(last=False)
+        return wav_bytes
+
+    async def decode_audio(self, audio_bytes: bytes) -> bytes:
+        """Convert a browser recording to raw int16 mono PCM via ffmpeg pipes"""
+        # Async subprocess so other connections keep being served while
+        # ffmpeg runs; no temp files on either side
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-i",
+            "pipe:0",
+            "-f",
+            "s16le",
+            "-ar",
+            "16000",
+            "-ac",
+            "1",
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
         try:
-            # Read audio file
-            with open(audio_path, "rb") as f:
-                audio_data = f.read()
-
-            # Connect to WhisperLive and send audio
-            await self.whisper_client.connect()
-
-            # Send audio in chunks
-            chunk_size = 1024
-            for i in range(0, len(audio_data), chunk_size):
-                chunk = audio_data[i : i + chunk_size]
-                await self.whisper_client.send_audio(chunk)
+            pcm, _ = await proc.communicate(audio_bytes)
+        finally:
+            # Cancelled mid-decode: don't leave ffmpeg running for nobody, and
+            # reap it so its pipe transports close now rather than at GC
+            if proc.returncode is None:
+                proc.kill()
+                await asyncio.shield(proc.wait())
+        if proc.returncode != 0:
+            logger.error(f"ffmpeg exited with status {proc.returncode}")
+            return b""
+        return pcm
+
+    async def warm_up(self):
+        """Connect to WhisperLive and probe the LLM and TTS concurrently"""
+        results = await asyncio.gather(
+            self.whisper_client.connect(),
+            self.llm_agent.health_check(),
+            self.tts_agent.check_tts_availability(),
+            return_exceptions=True,
+        )
+        whisper, llm_ok, tts_available = results
+        if isinstance(whisper, Exception):
+            logger.warning("WhisperLive not reachable yet; will retry per request")
+        if llm_ok is not True:
+            logger.warning("Ollama server not available")
+        if isinstance(tts_available, dict):
+            logger.info(f"TTS engines available: {tts_available}")
+
+    async def transcribe_pcm(self, audio_data: bytes):
+        """Transcribe 16 kHz int16 PCM using WhisperLive"""
+        try:
+            # The connection is kept across utterances; reconnect only if the
+            # server dropped it
+            if not self.whisper_client.is_connected:
+                await self.whisper_client.connect()
+
+            # Segments reported from here on belong to this utterance
+            self.whisper_client.begin_utterance()
+
+            # ~1 s chunks: a handful of queue entries per utterance instead of
+            # one per KiB (which also overflowed the client's send queue)
+            view = memoryview(audio_data)
+            for i in range(0, len(view), _SEND_CHUNK_BYTES):
+                await self.whisper_client.send_audio(
+                    view[i : i + _SEND_CHUNK_BYTES], realtime=False
+                )
 
-            # Get transcription
-            transcription = await self.whisper_client.get_transcription()
-            await self.whisper_client.disconnect()
+            # Flushes the queued audio, then waits for the final segment
+            transcription = await self.whisper_client.finish_utterance()
 
-            return transcription
+            return transcription or None
 
         except Exception as e:
             logger.error(f"Transcription error: {e}")
             return None
 
 
+# One warm agent, and WhisperLive connection, shared by every frontend
+# connection; the constructors only set up state, models load on first use
+VOICE_AGENT = WebVoiceAgent()
+
+
+async def process_until_closed(websocket, voice_agent, audio_bytes):
+    """Run a turn, cancelling it if the connection closes first
+
+    Returns None when the connection closed before the turn finished.
+    """
+    turn = asyncio.create_task(voice_agent.process_audio(audio_bytes))
+    closed = asyncio.create_task(websocket.wait_closed())
+    try:
+        await asyncio.wait((turn, closed), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        closed.cancel()
+        # Also reached when this handler itself is cancelled on shutdown
+        turn.cancel()
+    if not turn.done() or turn.cancelled():
+        logger.info("Connection closed mid-turn; cancelled its processing")
+        return None
+    return turn.result()
+
+
 async def handle_websocket(websocket):
     """Handle WebSocket connections from the frontend"""
     logger.info(f"New WebSocket connection: {websocket.remote_address}")
 
-    voice_agent = WebVoiceAgent()
+    voice_agent = VOICE_AGENT
 
     try:
         async for message in websocket:
             try:
-                data = json.loads(message)
+                if isinstance(message, bytes):
+                    # Binary frame: the recording itself, no base64/JSON wrapping
+                    data = {"type": "audio"}
+                    audio_bytes = message
+                else:
+                    data = _json_loads(message)
+                    if data.get("type") == "audio":
+                        # Legacy clients still send base64 inside JSON
+                        audio_bytes = base64.b64decode(data["data"])
 
                 if data.get("type") == "audio":
                     logger.info("Processing audio message")
 
                     # Send transcription update
                     await websocket.send(
-                        json.dumps(
+                        _json_dumps(
                             {"type": "status", "message": "Transcribing audio..."}
                         )
                     )
 
-                    # Process the audio
-                    result = await voice_agent.process_audio(data["data"])
+                    # Process the audio, abandoning it if the browser leaves
+                    result = await process_until_closed(
+                        websocket, voice_agent, audio_bytes
+                    )
+                    if result is None:
+                        break
 
                     if "error" in result:
                         await websocket.send(
-                            json.dumps({"type": "error", "message": result["error"]})
+                            _json_dumps({"type": "error", "message": result["error"]})
                         )
                     else:
                         # Send transcription
                         if result.get("transcription"):
                             await websocket.send(
-                                json.dumps(
+                                _json_dumps(
                                     {
                                         "type": "transcription",
                                         "text": result["transcription"],
@@ -142,26 +331,30 @@ async def handle_websocket(websocket):
                                 )
                             )
 
-                        # Send response with audio
+                        # Send the response text, then its WAV as a binary
+                        # frame: no base64 inflation or atob() on the client
+                        audio = result.get("audio")
                         await websocket.send(
-                            json.dumps(
+                            _json_dumps(
                                 {
                                     "type": "response",
                                     "text": result.get(
                                         "response", "No response generated"
                                     ),
-                                    "audio": result.get("audio"),
+                                    "audio": bool(audio),
                                 }
                             )
                         )
+                        if audio:
+                            await websocket.send(audio)
 
             except json.JSONDecodeError:
                 await websocket.send(
-                    json.dumps({"type": "error", "message": "Invalid JSON message"})
+                    _json_dumps({"type": "error", "message": "Invalid JSON message"})
                 )
             except Exception as e:
                 logger.error(f"Error handling message: {e}")
-                await websocket.send(json.dumps({"type": "error", "message": str(e)}))
+                await websocket.send(_json_dumps({"type": "error", "message": str(e)}))
 
     except websockets.exceptions.ConnectionClosed:
         logger.info("WebSocket connection closed")
@@ -171,19 +364,44 @@ async def handle_websocket(websocket):
 
 async def main():
     """Start the WebSocket server"""
+    if sys.version_info < _MIN_PYTHON:
+        # The stage pipeline uses asyncio.TaskGroup and Task.cancelling()
+        major, minor = _MIN_PYTHON
+        raise SystemExit(f"The web server needs Python {major}.{minor} or newer")
+
     logger.info("Starting Voice Agent Web Server...")
 
     # Check if required services are running
-    logger.info("Checking WhisperLive server...")
-    logger.info("Checking Ollama server...")
+    logger.info("Checking WhisperLive and Ollama servers...")
+    await VOICE_AGENT.warm_up()
 
     logger.info("Voice Agent Web Server running on ws://localhost:8765")
     logger.info("Open frontend/index.html in your browser to use the voice agent")
 
     # Start WebSocket server
-    async with websockets.serve(handle_websocket, "0.0.0.0", 8765):
-        await asyncio.Future()  # Run forever
+    try:
+        # Replies are WAV and uploads are compressed webm, so
+        # permessage-deflate only burns CPU; raise the 1 MiB frame cap so
+        # longer recordings fit
+        async with websockets.serve(
+            handle_websocket,
+            "0.0.0.0",
+            8765,
+            compression=None,
+            max_size=_MAX_MESSAGE_BYTES,
+        ):
+            await asyncio.Future()  # Run forever
+    finally:
+        await VOICE_AGENT.whisper_client.disconnect()
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+
+        # libuv event loop for the WebSocket, HTTP and subprocess traffic
+        uvloop.install()
+    except ImportError:
+        pass
+
     asyncio.run(main())